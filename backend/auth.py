@@ -1,10 +1,18 @@
 from datetime import datetime, timedelta
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import database, models
+from cache import TTLCache
 from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
@@ -18,8 +26,27 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30  # 30 days
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-# Password hashing setup using pbkdf2_sha256 and bcrypt for maximum compatibility
-pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
+# Password hashing setup using pbkdf2_sha256 and bcrypt for maximum compatibility.
+# New hashes use PASSWORD_SCHEME at the configured cost; hashes made with another
+# scheme or cost verify as before and are flagged for a rehash on the next login.
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "pbkdf2_sha256")
+PBKDF2_ROUNDS = int(os.getenv("PBKDF2_ROUNDS", "29000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+def make_pwd_context(scheme=PASSWORD_SCHEME, pbkdf2_rounds=PBKDF2_ROUNDS, bcrypt_rounds=BCRYPT_ROUNDS):
+    schemes = [scheme] + [s for s in ("pbkdf2_sha256", "bcrypt") if s != scheme]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=pbkdf2_rounds,
+        pbkdf2_sha256__min_rounds=pbkdf2_rounds,
+        pbkdf2_sha256__max_rounds=pbkdf2_rounds,
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds
+    )
+
+pwd_context = make_pwd_context()
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -27,6 +54,64 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """(matches, new_hash); new_hash is set when the stored hash uses an outdated scheme or cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# Hashing is CPU-bound and deliberately slow, so request handlers hand it to a
+# fixed pool of HASH_WORKERS processes instead of running it on the threadpool
+# (or the event loop) where a burst of logins would starve every other endpoint.
+# Handlers await the result, so a queue of logins holds no threads either.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+_HASH_POOL = None
+_hash_pool_lock = threading.Lock()
+# Auth requests in progress at once: enough to keep the pool busy. The rest
+# wait here holding nothing, instead of queueing their user lookups in the
+# threadpool ahead of every other endpoint's requests.
+AUTH_SLOTS = asyncio.Semaphore(2 * HASH_WORKERS)
+
+def _hash_pool():
+    global _HASH_POOL
+    with _hash_pool_lock:
+        if _HASH_POOL is None:
+            # spawn: forking a process that already runs server threads is unsafe
+            _HASH_POOL = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _HASH_POOL
+
+def _discard_pool(pool):
+    """Drop a broken pool so the next _hash_pool() call starts a fresh one."""
+    global _HASH_POOL
+    with _hash_pool_lock:
+        if _HASH_POOL is pool:
+            _HASH_POOL = None
+    pool.shutdown(wait=False)
+
+async def _run_in_pool(fn, *args):
+    """Await fn(*args) in the hashing pool, replacing the pool once if a worker died."""
+    for attempt in range(2):
+        pool = _hash_pool()
+        try:
+            return await asyncio.wrap_future(pool.submit(fn, *args))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            if attempt:
+                raise
+
+async def hash_password_async(password):
+    """get_password_hash in the hashing pool, awaited without holding a thread."""
+    return await _run_in_pool(get_password_hash, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    """verify_and_update_password in the hashing pool, awaited without holding a thread."""
+    return await _run_in_pool(verify_and_update_password, plain_password, hashed_password)
+
+def shutdown_hash_pool():
+    global _HASH_POOL
+    with _hash_pool_lock:
+        if _HASH_POOL is not None:
+            _HASH_POOL.shutdown()
+            _HASH_POOL = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -37,6 +122,73 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Verified principals by token subject (email), so authenticated requests skip the
+# users lookup. Tokens are still decoded and checked on every request; call
+# invalidate_principal when a user's password, role, name or email changes.
+PRINCIPAL_CACHE = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+    ttl=int(os.getenv("AUTH_CACHE_TTL", "300"))
+)
+
+def invalidate_principal(email: str):
+    PRINCIPAL_CACHE.pop(email)
+
+# Token revocation. Tokens carry the user's token_version ("ver") from when they
+# were issued; bumping users.token_version revokes every older token. Only users
+# who have ever revoked are listed here, so the check is one dict lookup. Other
+# workers' revocations are picked up by re-reading them every
+# REVOCATION_SYNC_SECONDS.
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "30"))
+_token_versions = {}
+_synced_at = 0.0
+_sync_lock = threading.Lock()
+
+def sync_token_versions():
+    """Reload the current token_version of every user who has revoked tokens."""
+    global _synced_at
+    # Set first, so a failing database is retried once per interval, not per request
+    _synced_at = time.monotonic()
+    with database.engine.connect() as conn:
+        rows = conn.execute(
+            select(models.User.email, models.User.token_version).where(models.User.token_version > 0)
+        ).all()
+    for email, version in rows:
+        # Versions only go up; never undo a newer local revocation with an older read
+        if version > _token_versions.get(email, 0):
+            _token_versions[email] = version
+
+def _token_revoked(email: str, payload: dict) -> bool:
+    if time.monotonic() - _synced_at > REVOCATION_SYNC_SECONDS and _sync_lock.acquire(blocking=False):
+        try:
+            sync_token_versions()
+        except Exception as e:
+            print(f"Token revocation sync failed: {e}")
+        finally:
+            _sync_lock.release()
+    return payload.get("ver", 0) < _token_versions.get(email, 0)
+
+def tokens_revoked(email: str, version: int):
+    """Call after committing a bumped users.token_version: older tokens stop working at once."""
+    if version > _token_versions.get(email, 0):
+        _token_versions[email] = version
+    invalidate_principal(email)
+
+def _principal(email: str, db: Session) -> Optional[dict]:
+    principal = PRINCIPAL_CACHE.get(email)
+    if principal is None:
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if user is None:
+            return None
+        principal = {
+            "id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "role": user.role
+        }
+        PRINCIPAL_CACHE.set(email, principal)
+    # Callers get their own copy to modify
+    return dict(principal)
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,38 +198,25 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or _token_revoked(email, payload):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    # Return user as a dict for compatibility with existing code
+    user = _principal(email, db)
     
     if user is None:
         raise credentials_exception
     
-    # Return user as a dict for compatibility with existing code or use the model
-    return {
-        "id": user.id,
-        "email": user.email,
-        "name": user.name,
-        "role": user.role
-    }
+    return user
 
 def get_current_user_optional(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or _token_revoked(email, payload):
             return None
-        user = db.query(models.User).filter(models.User.email == email).first()
-        if user is None:
-            return None
-        return {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
-            "role": user.role
-        }
+        return _principal(email, db)
     except Exception:
         return None
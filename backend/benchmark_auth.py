@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'auth_bench.db')}"
+
+from jose import jwt
+from sqlalchemy import insert
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+
+N_USERS = int(os.getenv("BENCH_USERS", "10000"))
+CALLS = int(os.getenv("BENCH_CALLS", "5000"))
+
+def per_call_us(fn, calls=CALLS):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+def run_benchmark():
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"name": f"User {i}", "email": f"bench{i}@test.com", "password": "x", "role": "learner"} for i in range(N_USERS)
+        ])
+    # A few hundred active users, as on a busy instance
+    tokens = [auth.create_access_token({"sub": f"bench{i}@test.com"}) for i in range(0, N_USERS, N_USERS // 200)]
+    print(f"{N_USERS} users, {len(tokens)} active tokens, {CALLS} calls per row\n")
+
+    db = database.SessionLocal()
+    try:
+        decode_us = per_call_us(lambda i: jwt.decode(tokens[i % len(tokens)], auth.SECRET_KEY, algorithms=[auth.ALGORITHM]))
+
+        def uncached(i):
+            auth.PRINCIPAL_CACHE.clear()
+            auth.get_current_user(tokens[i % len(tokens)], db)
+        uncached_us = per_call_us(uncached)
+
+        auth.PRINCIPAL_CACHE.clear()
+        cached_us = per_call_us(lambda i: auth.get_current_user(tokens[i % len(tokens)], db))
+    finally:
+        db.close()
+
+    print(f"{'get_current_user':>28} | {'us/call':>8}")
+    print("-" * 40)
+    print(f"{'jwt.decode only':>28} | {decode_us:>8.1f}")
+    print(f"{'users lookup every call':>28} | {uncached_us:>8.1f}")
+    print(f"{'principal cache':>28} | {cached_us:>8.1f}")
+
+    # End to end: a protected endpoint that does little besides authenticating
+    client = TestClient(main.app)
+    def request(i):
+        client.get("/users/me/certificates", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+    http_calls = CALLS // 5
+    def request_uncached(i):
+        auth.PRINCIPAL_CACHE.clear()
+        request(i)
+    uncached_http = per_call_us(request_uncached, http_calls)
+    auth.PRINCIPAL_CACHE.clear()
+    cached_http = per_call_us(request, http_calls)
+    print(f"\nGET /users/me/certificates: {uncached_http:.0f} us/request uncached, {cached_http:.0f} us/request cached")
+    return True
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
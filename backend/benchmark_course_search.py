@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+import random
+import itertools
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before database is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search_bench.db')}"
+
+from sqlalchemy import or_, text
+
+import database, models, search
+
+N_COURSES = int(os.getenv("BENCH_COURSES", "100000"))
+QUERIES = ["python", "machine learning", "datab", "advanced security", "zebra"]
+WORDS = (
+    "python java javascript react data structures algorithms machine learning "
+    "statistics web development design database sql networks security cloud "
+    "beginners advanced introduction course module project practice theory "
+    "analysis models systems programming fundamentals testing deployment"
+).split()
+
+def seed(n):
+    """Courses over a Zipf-like vocabulary: topic words plus a long tail of rarer ones."""
+    rnd = random.Random(7)
+    tail = ["".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(7)) for _ in range(20000)]
+    vocab = WORDS + tail
+    cum_weights = list(itertools.accumulate(1 / (rank + 10) for rank in range(len(vocab))))
+    rows = [
+        {
+            "title": " ".join(rnd.choices(vocab, cum_weights=cum_weights, k=4)).title(),
+            "description": " ".join(rnd.choices(vocab, cum_weights=cum_weights, k=40)),
+            "status": "Published"
+        } for _ in range(n)
+    ]
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO courses (title, description, status) VALUES (:title, :description, :status)"), rows)
+
+def ilike_search(db, q, limit=None):
+    return db.query(models.Course.id).filter(
+        models.Course.status == "Published",
+        or_(models.Course.title.ilike(f"%{q}%"), models.Course.description.ilike(f"%{q}%"))
+    ).limit(limit).all()
+
+def fts_search(db, q, limit=None):
+    query = db.query(models.Course.id).filter(models.Course.status == "Published")
+    return search.apply_course_search(query, q).limit(limit).all()
+
+def time_ms(fn, db, q, limit=None, repeats=3):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        rows = fn(db, q, limit)
+    return (time.perf_counter() - start) / repeats * 1000, len(rows)
+
+def run_benchmark():
+    models.Base.metadata.create_all(bind=database.engine)
+    if not search.setup_course_search(database.engine):
+        print("FTS5 is not available in this SQLite build.")
+        return False
+
+    start = time.perf_counter()
+    seed(N_COURSES)
+    print(f"Seeded {N_COURSES} courses (index maintained by triggers) in {time.perf_counter() - start:.1f} s\n")
+
+    header = (f"{'query':>20} | {'ilike ms':>9} | {'hits':>6} | {'fts ms':>8} | {'hits':>6} | "
+              f"{'ilike top20':>11} | {'fts top20':>9}")
+    print(header)
+    print("-" * len(header))
+    db = database.SessionLocal()
+    try:
+        for q in QUERIES:
+            ilike_ms, ilike_hits = time_ms(ilike_search, db, q)
+            fts_ms, fts_hits = time_ms(fts_search, db, q)
+            ilike_page_ms, _ = time_ms(ilike_search, db, q, limit=20)
+            fts_page_ms, _ = time_ms(fts_search, db, q, limit=20)
+            print(f"{q:>20} | {ilike_ms:>9.1f} | {ilike_hits:>6} | {fts_ms:>8.1f} | {fts_hits:>6} | "
+                  f"{ilike_page_ms:>11.1f} | {fts_page_ms:>9.1f}")
+    finally:
+        db.close()
+    print("\nilike matches substrings of the whole phrase; FTS matches every word as a prefix, ranked.")
+    return True
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
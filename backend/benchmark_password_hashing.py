@@ -0,0 +1,117 @@
+import sys
+import os
+import time
+import tempfile
+import asyncio
+import statistics
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'hash_bench.db')}"
+
+import httpx
+
+import database, models, auth
+from verify_chat_stream import start_app
+
+VERIFIES = int(os.getenv("BENCH_VERIFIES", "40"))
+STORM_LOGINS = int(os.getenv("BENCH_LOGINS", "60"))
+COSTS = [("pbkdf2_sha256", {"pbkdf2_rounds": r}) for r in (10000, 29000, 100000)] + [("bcrypt", {"bcrypt_rounds": r}) for r in (10, 12)]
+
+def verifies_per_second(context, n=VERIFIES):
+    hashed = context.hash("correct horse")
+    start = time.perf_counter()
+    for _ in range(n):
+        context.verify("correct horse", hashed)
+    return n / (time.perf_counter() - start)
+
+def cost_table():
+    print(f"{'scheme':>14} | {'cost':>7} | {'ms/login':>8} | {'logins/s/core':>13}")
+    print("-" * 52)
+    for scheme, cost in COSTS:
+        try:
+            rate = verifies_per_second(auth.make_pwd_context(scheme=scheme, **cost), n=max(VERIFIES // 4, 5))
+        except Exception as e:
+            print(f"{scheme:>14} | {list(cost.values())[0]:>7} | unavailable: {str(e)[:40]}")
+            continue
+        print(f"{scheme:>14} | {list(cost.values())[0]:>7} | {1000 / rate:>8.1f} | {rate:>13.1f}")
+
+def pool_throughput():
+    hashed = auth.get_password_hash("correct horse")
+    auth._hash_pool().submit(auth.verify_password, "warm", hashed).result()
+    start = time.perf_counter()
+    futures = [auth._hash_pool().submit(auth.verify_and_update_password, "correct horse", hashed) for _ in range(VERIFIES * auth.HASH_WORKERS)]
+    for future in futures:
+        future.result()
+    rate = len(futures) / (time.perf_counter() - start)
+    print(f"\nHashing pool, {auth.HASH_WORKERS} worker(s): {rate:.1f} logins/s, {rate / auth.HASH_WORKERS:.1f} logins/s per core")
+
+def p95(values):
+    return statistics.quantiles(values, n=20)[-1]
+
+async def probe_latencies(http, until=None, count=20):
+    """Latencies (s) of GET /badges/all, one after another, `count` times or until `until` is done."""
+    latencies = []
+    while (len(latencies) < count) if until is None else not until.done():
+        start = time.perf_counter()
+        await http.get("/badges/all")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+async def run_storm(base_url):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=httpx.Limits(max_connections=None)) as http:
+        idle = await probe_latencies(http)
+
+        async def login(_):
+            resp = await http.post("/auth/login", json={"username": "storm@example.com", "password": "pw"})
+            return resp.status_code
+
+        start = time.perf_counter()
+        logins = asyncio.gather(*(login(i) for i in range(STORM_LOGINS)))
+        await asyncio.sleep(0.1)
+        busy = await probe_latencies(http, until=logins)
+        statuses = await logins
+        elapsed = time.perf_counter() - start
+    return idle, busy, statuses, elapsed
+
+def login_storm():
+    """Concurrent logins against the real app while timing a cheap endpoint."""
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        db.add(models.User(name="Storm", email="storm@example.com", password=auth.get_password_hash("pw"), role="learner"))
+        db.commit()
+    finally:
+        db.close()
+    server, base_url = start_app()
+    try:
+        idle, busy, statuses, elapsed = asyncio.run(run_storm(base_url))
+    finally:
+        server.should_exit = True
+
+    ok = statuses.count(200)
+    print(f"\nLogin storm: {ok}/{STORM_LOGINS} logins in {elapsed:.1f} s ({ok / elapsed:.1f}/s, "
+          f"{ok / elapsed / auth.HASH_WORKERS:.1f}/s per hashing core)")
+    print(f"GET /badges/all idle: p95 {p95(idle) * 1000:.0f} ms; during the storm: median "
+          f"{statistics.median(busy) * 1000:.0f} ms, max {max(busy) * 1000:.0f} ms over {len(busy)} requests")
+    if ok != STORM_LOGINS:
+        print("Error: some logins failed.")
+        return False
+    # Logins queued on the hashing pool must not hold the threads other endpoints need
+    if max(busy) > max(10 * p95(idle), 0.5):
+        print("Error: other endpoints stalled during the login storm.")
+        return False
+    return True
+
+if __name__ == "__main__":
+    print(f"Configured: {auth.PASSWORD_SCHEME}, PBKDF2_ROUNDS={auth.PBKDF2_ROUNDS}, BCRYPT_ROUNDS={auth.BCRYPT_ROUNDS}, "
+          f"HASH_WORKERS={auth.HASH_WORKERS}, {os.cpu_count()} CPU(s)\n")
+    cost_table()
+    pool_throughput()
+    ok = login_storm()
+    auth.shutdown_hash_pool()
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import random
+import tracemalloc
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+import rag
+from scratch_index import use_scratch_index
+
+CORPUS_SIZES = [100, 1000, 5000, 20000]
+QUERIES = [
+    "How do I learn Python?",
+    "introduction to machine learning models",
+    "what is covered in the data structures course",
+    "web development with react and javascript",
+    "statistics for beginners",
+]
+
+WORDS = (
+    "python java javascript react data structures algorithms machine learning "
+    "statistics web development design database sql networks security cloud "
+    "beginners advanced introduction course module project practice theory "
+    "analysis models systems programming fundamentals testing deployment"
+).split()
+
+# (embedding dict, text) pairs in the pre-vocabulary store layout
+BASELINE_STORE = []
+
+def make_courses(n, seed=42):
+    rnd = random.Random(seed)
+    courses = []
+    for i in range(n):
+        title = " ".join(rnd.choice(WORDS) for _ in range(4)).title()
+        description = " ".join(rnd.choice(WORDS) for _ in range(30))
+        courses.append({"id": i, "title": title, "description": description, "modules": []})
+    return courses
+
+def linear_retrieve(query, top_k=3):
+    """The original full-scan retrieval over dict embeddings, kept as the baseline."""
+    query_emb = rag.get_embedding(query)
+    scored = []
+    for embedding, text in BASELINE_STORE:
+        score = rag.cosine_similarity(query_emb, embedding)
+        scored.append((score, text))
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return [text for _, text in scored[:top_k]]
+
+def store_memory_kb(build):
+    tracemalloc.start()
+    store = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return size / 1024
+
+def time_per_query(fn, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) / (repeats * len(QUERIES)) * 1000
+
+def run_benchmark():
+    global BASELINE_STORE
+    # Keep the benchmark from overwriting the real index and debug log
+    use_scratch_index()
+
+    header = f"{'chunks':>8} | {'linear scan':>11} | {'inverted idx':>12} | {'mmap':>8}"
+    if rag.np is not None:
+        header += f" | {'numpy':>8} | {'numpy batch':>11}"
+    print("Per-query latency (ms)")
+    print(header)
+    print("-" * len(header))
+    for size in CORPUS_SIZES:
+        rag.index_content(make_courses(size))
+        BASELINE_STORE = [(rag.get_embedding(c["text"]), c["text"]) for c in rag.VECTOR_STORE]
+
+        rag.RAG_BACKEND = "python"
+        for q in QUERIES:
+            if linear_retrieve(q) != rag.retrieve(q):
+                print(f"Mismatch for query '{q}' at {size} chunks!")
+                return False
+        linear_ms = time_per_query(linear_retrieve)
+        indexed_ms = time_per_query(rag.retrieve)
+
+        # Same queries against the memory-mapped file instead of the in-memory store
+        in_memory = rag.VECTOR_STORE
+        rag.VECTOR_STORE = None
+        rag.load_index()
+        if [rag.retrieve(q) for q in QUERIES] != [linear_retrieve(q) for q in QUERIES]:
+            print(f"Mapped index mismatch at {size} chunks!")
+            return False
+        mapped_ms = time_per_query(rag.retrieve)
+        rag.VECTOR_STORE = in_memory
+        row = f"{size:>8} | {linear_ms:>11.3f} | {indexed_ms:>12.3f} | {mapped_ms:>8.3f}"
+
+        if rag.np is not None:
+            rag.RAG_BACKEND = "numpy"
+            if rag.retrieve_batch(QUERIES) != [linear_retrieve(q) for q in QUERIES]:
+                print(f"NumPy backend mismatch at {size} chunks!")
+                return False
+            numpy_ms = time_per_query(rag.retrieve)
+            start = time.perf_counter()
+            for _ in range(5):
+                rag.retrieve_batch(QUERIES * 10)
+            batch_ms = (time.perf_counter() - start) / (5 * len(QUERIES) * 10) * 1000
+            row += f" | {numpy_ms:>8.3f} | {batch_ms:>11.3f}"
+        print(row)
+
+    # Cold start: parse the JSON store vs map the binary file
+    json_path = rag.JSON_INDEX_FILE
+    with open(json_path, "w") as f:
+        terms = sorted(rag.VOCAB, key=rag.VOCAB.get)
+        json.dump({
+            "version": 2,
+            "vocab": terms,
+            "chunks": [
+                {"text": c["text"], "course_id": c["course_id"], "ids": c["ids"].tolist(),
+                 "weights": c["weights"].tolist(), "norm": c["norm"]} for c in rag.VECTOR_STORE
+            ]
+        }, f)
+    start = time.perf_counter()
+    rag.load_json_index(json_path)
+    json_ms = (time.perf_counter() - start) * 1000
+    rag.VECTOR_STORE = None
+    start = time.perf_counter()
+    rag.load_index()
+    mmap_ms = (time.perf_counter() - start) * 1000
+    print(f"\nCold load of {len(rag.MAPPED_INDEX)} chunks: JSON {json_ms:.1f} ms "
+          f"({os.path.getsize(json_path) // 1024} KB), mmap {mmap_ms:.3f} ms "
+          f"({os.path.getsize(rag.INDEX_FILE) // 1024} KB)")
+    rag.load_json_index(json_path)
+
+    # Memory held by the chunk vectors alone (texts excluded)
+    texts = [c["text"] for c in rag.VECTOR_STORE]
+    dict_kb = store_memory_kb(lambda: [rag.get_embedding(t) for t in texts])
+    compact_kb = store_memory_kb(
+        lambda: [rag._make_chunk(t, None, rag.get_embedding(t), rag.VOCAB) for t in texts]
+    )
+    print(f"Vector memory for {len(texts)} chunks: dict {dict_kb:.0f} KB, compact {compact_kb:.0f} KB")
+    return True
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+import rag
+
+def convert(json_path=rag.JSON_INDEX_FILE, bin_path=rag.INDEX_FILE):
+    """One-shot conversion of the JSON vector store into the binary, mmap-able format."""
+    if not os.path.exists(json_path):
+        print(f"Nothing to convert: {json_path} not found.")
+        return False
+
+    print(f"Loading {json_path}...")
+    if not rag.load_json_index(json_path):
+        print("Error: could not parse the JSON index (see rag_debug.log).")
+        return False
+    # Fold in any incremental updates logged on top of the JSON store
+    rag._replay_journal()
+
+    rag.INDEX_FILE = bin_path
+    rag.save_index()
+    if not os.path.exists(bin_path):
+        print("Error: binary index was not written (see rag_debug.log).")
+        return False
+
+    # Check the result maps cleanly and holds the same chunks
+    expected = [chunk["text"] for chunk in rag.VECTOR_STORE if chunk is not None]
+    rag.VECTOR_STORE = None
+    if not rag.load_index() or rag.MAPPED_INDEX is None:
+        print("Error: written index could not be mapped.")
+        return False
+    written = [rag.MAPPED_INDEX.text(i) for i in range(len(rag.MAPPED_INDEX))]
+    if written != expected:
+        print("Error: chunk texts differ after conversion.")
+        return False
+
+    json_size = os.path.getsize(json_path)
+    bin_size = os.path.getsize(bin_path)
+    print(f"Converted {len(written)} chunks: {json_path} ({json_size} bytes) -> {bin_path} ({bin_size} bytes)")
+    return True
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not convert(*args):
+        sys.exit(1)
@@ -0,0 +1,59 @@
+"""
+Strong ETags and conditional GET for JSON endpoints.
+
+Responses carry an ETag and `Cache-Control: private, no-cache`, so clients
+keep the body but revalidate it on every use. A request whose If-None-Match
+lists the current ETag gets an empty 304 instead of the body.
+
+Tags are derived from what the response depends on (a content hash or version
+counters), never by building the body just to hash it.
+"""
+import os
+import hashlib
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+CACHE_CONTROL = "private, no-cache"
+# In-memory version counters restart from zero, so tags built from them also
+# carry a per-process token; a tag from before a restart never matches
+PROCESS_TOKEN = os.urandom(8)
+
+def make_etag(*parts: bytes) -> str:
+    """Strong ETag over the given byte strings."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return f'"{digest.hexdigest()}"'
+
+def version_etag(*parts) -> str:
+    """
+    ETag from cheap version inputs (counters, ids, flags) instead of the body,
+    so a handler can answer 304 before running its queries.
+    """
+    return make_etag(PROCESS_TOKEN, repr(parts).encode())
+
+def matches(request, etag: str) -> bool:
+    """Whether the request's If-None-Match accepts the current ETag (weak comparison, as for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def json_response(request, body: bytes, etag: str) -> Response:
+    """Already-serialized JSON body with its ETag, or a 304 if the client has it."""
+    if matches(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def conditional_json(request, content, etag: str) -> Response:
+    """Serialize content the way FastAPI would and send it with the given ETag (or a 304)."""
+    if matches(request, etag):
+        return not_modified(etag)
+    return json_response(request, JSONResponse(content=jsonable_encoder(content)).body, etag)
@@ -0,0 +1,100 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeLLMServer:
+    """
+    Minimal stand-in for the Groq chat completions API, for local tests.
+    Point a client at it with GROQ_BASE_URL=<server.base_url> (any API key works).
+    Answers are `tokens`, sent `token_delay` seconds apart.
+    """
+
+    def __init__(self, tokens=None, token_delay=0.2, port=0):
+        self.tokens = tokens or ["Recursion ", "is ", "a ", "function ", "calling ", "itself."]
+        self.token_delay = token_delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    if body.get("stream"):
+                        self._stream(body)
+                    else:
+                        self._complete(body)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _complete(self, body):
+                time.sleep(fake.token_delay * len(fake.tokens))
+                payload = json.dumps({
+                    "id": "fake", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "".join(fake.tokens)}
+                    }]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, token in enumerate(fake.tokens):
+                    if i:
+                        time.sleep(fake.token_delay)
+                    chunk = {
+                        "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": body.get("model"),
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+if __name__ == "__main__":
+    server = FakeLLMServer(port=8099).start()
+    print(f"Fake LLM listening on {server.base_url} (set GROQ_BASE_URL to this)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
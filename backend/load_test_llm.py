@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+import asyncio
+import statistics
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+import httpx
+from groq import Groq
+
+import rag
+from fake_llm_server import FakeLLMServer
+from verify_chat_stream import start_app
+
+CONCURRENT_CHATS = 24
+PROBES = 40
+
+async def probe_latencies(http, base_url, until=None):
+    """Latency of cheap endpoints, sampled one after another (ms), PROBES times or until `until` is done."""
+    latencies = []
+    i = 0
+    while (i < PROBES) if until is None else not until.done():
+        path = "/" if i % 2 else "/courses"
+        i += 1
+        start = time.perf_counter()
+        resp = await http.get(f"{base_url}{path}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if resp.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {resp.status_code}")
+        await asyncio.sleep(0.02)
+    return latencies
+
+def hold_index_lock(seconds):
+    """Stand-in for a course update rewriting the index under rag._INDEX_LOCK."""
+    with rag._INDEX_LOCK:
+        time.sleep(seconds)
+
+def p95(values):
+    return statistics.quantiles(values, n=20)[-1]
+
+async def run_load(base_url, llm):
+    async with httpx.AsyncClient(timeout=120) as http:
+        idle = await probe_latencies(http, base_url)
+
+        async def chat(i):
+            resp = await http.post(f"{base_url}/api/chat", json={"message": f"Question {i}"})
+            return resp.status_code == 200 and resp.json()["response"] == "".join(llm.tokens)
+
+        start = time.perf_counter()
+        chats = asyncio.gather(*(chat(i) for i in range(CONCURRENT_CHATS)))
+        await asyncio.sleep(0.1)
+        busy = await probe_latencies(http, base_url, until=chats)
+        results = await chats
+        chats_s = time.perf_counter() - start
+
+        # A chat waiting on the index lock must not hold up the loop either
+        rewrite = asyncio.ensure_future(asyncio.to_thread(hold_index_lock, 1.5))
+        await asyncio.sleep(0.1)
+        locked_chat = asyncio.ensure_future(chat(CONCURRENT_CHATS))
+        await asyncio.sleep(0.1)
+        locked = await probe_latencies(http, base_url, until=locked_chat)
+        results.append(await locked_chat)
+        await rewrite
+    return idle, busy, locked, results, chats_s
+
+def test_llm_load():
+    print("Load testing /api/chat against a slow fake LLM...")
+    llm = FakeLLMServer(token_delay=0.25).start()
+    rag.client = Groq(api_key="test", base_url=llm.base_url)
+    server, base_url = start_app()
+    try:
+        idle, busy, locked, results, chats_s = asyncio.run(run_load(base_url, llm))
+    finally:
+        server.should_exit = True
+        llm.stop()
+
+    print(f"{CONCURRENT_CHATS} chats finished in {chats_s:.2f} s, "
+          f"at most {llm.max_in_flight} LLM calls in flight (limit {rag.LLM_MAX_CONCURRENCY})")
+    print(f"Other endpoints: idle p95 {p95(idle):.1f} ms, "
+          f"during chats max {max(busy):.1f} ms over {len(busy)} requests")
+
+    if not all(results):
+        print("Error: some chats failed.")
+        return False
+    if llm.max_in_flight > rag.LLM_MAX_CONCURRENCY:
+        print("Error: concurrency limit exceeded.")
+        return False
+    # A blocked event loop would hold probes for whole completions (1.5 s each)
+    if max(busy) > max(10 * p95(idle), 500):
+        print("Error: other endpoints stalled while chats were in flight.")
+        return False
+    print("Success: event loop stayed responsive.")
+    print(f"While the index was locked: max {max(locked):.1f} ms over {len(locked)} requests")
+    if max(locked) > max(10 * p95(idle), 500):
+        print("Error: other endpoints stalled while a chat waited for the index.")
+        return False
+    print("Success: retrieval waits for the index off the event loop.")
+    return True
+
+if __name__ == "__main__":
+    if test_llm_load():
+        print("\nLLM LOAD TEST PASSED!")
+    else:
+        print("\nLLM LOAD TEST FAILED!")
+        sys.exit(1)
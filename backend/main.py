@@ -1,16 +1,22 @@
 import models, database, auth, schemas, random
 from datetime import timedelta, datetime
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Request
+from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Request, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-import os, shutil, csv
+import os, shutil, csv, json, base64, threading, hashlib
 from io import StringIO
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy import or_, func, case
 from pydantic import BaseModel  # Import BaseModel
 import rag  # Import the RAG engine
+import search
+import progress
+import notifications
+import etags
+from cache import TTLCache
 from dotenv import load_dotenv
 
 # Load environment variables at the very beginning
@@ -18,6 +24,8 @@ load_dotenv(override=True)
 
 # Create database tables
 models.Base.metadata.create_all(bind=database.engine)
+search.setup_course_search(database.engine)
+progress.backfill(database.engine)
 
 app = FastAPI(title="EdWeb API (SQLAlchemy)")
 
@@ -28,30 +36,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # --- RAG Integration ---
+def rag_question_data(question):
+    return {"questionText": question.questionText, "options": [o.text for o in question.options]}
+
+def rag_course_data(course):
+    """Shape a Course row the way rag.index_content / rag.upsert_course expect."""
+    return {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "modules": [
+            {
+                "id": m.id,
+                "title": m.title,
+                "contentLink": m.contentLink,
+                "questions": [rag_question_data(q) for q in m.quiz]
+            } for m in course.modules
+        ],
+        "assessment": [rag_question_data(q) for q in course.assessment]
+    }
+
+def sync_course_index(course):
+    """Apply a course change to the RAG index: published courses are (re)indexed, others dropped."""
+    try:
+        if course.status == "Published":
+            rag.upsert_course(rag_course_data(course))
+        else:
+            rag.remove_course(course.id)
+    except Exception as e:
+        print(f"Failed to update RAG index for course {course.id}: {e}")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    auth.shutdown_hash_pool()
+
 @app.on_event("startup")
 def startup_event():
-    # Only index content if not already indexed (lazy/persisted)
-    if rag.is_indexed():
+    # Only index content if not already indexed (lazy/persisted) by this version
+    if rag.is_indexed() and rag.is_current():
         print("RAG Index found on disk. Skipping startup indexing.")
         return
 
     print("Building initial RAG Index...")
     db = database.SessionLocal()
     try:
-        courses = db.query(models.Course).filter(models.Course.status == "Published").all()
+        courses = db.query(models.Course).options(
+            selectinload(models.Course.modules).selectinload(models.Module.quiz).selectinload(models.Question.options),
+            selectinload(models.Course.assessment).selectinload(models.Question.options)
+        ).filter(models.Course.status == "Published").all()
         # Transform to list of dicts for RAG
-        courses_data = []
-        for c in courses:
-            c_dict = {
-                "id": c.id,
-                "title": c.title,
-                "description": c.description,
-                "modules": [{"id": m.id, "title": m.title, "contentLink": m.contentLink} for m in c.modules]
-            }
-            courses_data.append(c_dict)
+        courses_data = [rag_course_data(c) for c in courses]
         
         # Build Index
         rag.index_content(courses_data)
@@ -64,17 +102,38 @@ def startup_event():
 class ChatRequest(BaseModel):
     message: str
     history: Optional[List[dict]] = []
+    stream: bool = False
 
 
+def chat_events(user_query, context_chunks):
+    """Server-Sent Events for a streamed chat answer: token events, then done (or error)."""
+    try:
+        for token in rag.stream_response(user_query, context_chunks):
+            yield f"data: {json.dumps({'token': token})}\n\n"
+    except Exception as e:
+        print(f"Chat Stream Error: {e}")
+        yield f"event: error\ndata: {json.dumps({'detail': 'AI response failed'})}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
 @app.post("/api/chat")
 async def chat_endpoint(request: ChatRequest):
     user_query = request.message
     
-    # 1. Retrieve Context
-    context_chunks = rag.retrieve(user_query)
+    # 1. Retrieve Context (in the threadpool: it can wait on _INDEX_LOCK while
+    # a course update rewrites the index)
+    context_chunks = await run_in_threadpool(rag.retrieve, user_query)
     
     # 2. Generate Response
-    response_text = rag.generate_response(user_query, context_chunks)
+    if request.stream:
+        # Sync generator: Starlette iterates it in the threadpool, so the
+        # blocking Groq stream never runs on the event loop
+        return StreamingResponse(
+            chat_events(user_query, context_chunks),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    response_text = await rag.run_llm(rag.generate_response, user_query, context_chunks)
     
     return {"response": response_text}
 
@@ -85,7 +144,7 @@ async def clean_speech_endpoint(request: schemas.CleanSpeechRequest):
     Part of the Accessibility Voice Mode feature.
     """
     try:
-        cleaned = rag.clean_speech(request.text)
+        cleaned = await rag.run_llm(rag.clean_speech, request.text)
         return {"cleaned_text": cleaned, "confidence": None}
     except Exception as e:
         print(f"Clean Speech Endpoint Error: {e}")
@@ -97,7 +156,7 @@ async def ai_generate_questions(request: schemas.AIGenerateRequest, current_user
     if current_user["role"] != "instructor":
         raise HTTPException(status_code=403, detail="Only instructors can generate questions")
     
-    questions = rag.generate_questions(request.topic, request.questionType, request.count, difficulty="mixed")
+    questions = await rag.run_llm(rag.generate_questions, request.topic, request.questionType, request.count, difficulty="mixed")
     return {"questions": questions}
 
 
@@ -129,41 +188,68 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 def read_root():
     return {"message": "EdWeb API (SQLAlchemy) is running"}
 
-@app.post("/auth/register", response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = auth.get_password_hash(user.password)
-    new_user = models.User(
-        name=user.name,
-        email=user.email,
-        password=hashed_password,
-        role=user.role
-    )
-    db.add(new_user)
+# The auth handlers are async so that waiting on the hashing pool holds no
+# threadpool thread; their database work still runs in the threadpool.
+def first_row(db: Session, query):
+    """First row of a column query, ending the read so no pooled connection is held while the hash runs."""
+    row = query.first()
+    db.rollback()
+    return row
+
+def add_and_refresh(db: Session, instance):
+    db.add(instance)
     db.commit()
-    db.refresh(new_user)
-    return new_user
+    db.refresh(instance)
+    return instance
+
+def login_user(db: Session, user_id: int, new_hash: Optional[str]):
+    """The user row, storing new_hash first if the old hash used an outdated scheme or cost."""
+    user = db.get(models.User, user_id)
+    if new_hash:
+        user.password = new_hash
+        db.commit()
+        db.refresh(user)
+    return user
+
+@app.post("/auth/register", response_model=schemas.UserResponse)
+async def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+    async with auth.AUTH_SLOTS:
+        if await run_in_threadpool(first_row, db, db.query(models.User.id).filter(models.User.email == user.email)):
+            raise HTTPException(status_code=400, detail="Email already registered")
+        
+        hashed_password = await auth.hash_password_async(user.password)
+        new_user = models.User(
+            name=user.name,
+            email=user.email,
+            password=hashed_password,
+            role=user.role
+        )
+        return await run_in_threadpool(add_and_refresh, db, new_user)
 
 @app.post("/auth/login", response_model=schemas.Token)
-def login(user_data: schemas.UserLogin, db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.email == user_data.username).first()
-    
-    if not user or not auth.verify_password(user_data.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
+async def login(user_data: schemas.UserLogin, db: Session = Depends(database.get_db)):
+    async with auth.AUTH_SLOTS:
+        account = await run_in_threadpool(
+            first_row, db, db.query(models.User.id, models.User.password).filter(models.User.email == user_data.username)
         )
+        
+        verified, new_hash = await auth.verify_password_async(user_data.password, account.password) if account else (False, None)
+        if not verified:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        user = await run_in_threadpool(login_user, db, account.id, new_hash)
     
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={
             "sub": user.email, 
             "role": user.role,
-            "id": user.id
+            "id": user.id,
+            "ver": user.token_version or 0
         }, 
         expires_delta=access_token_expires
     )
@@ -204,8 +290,22 @@ def verify_otp(request: schemas.VerifyOtpRequest, db: Session = Depends(database
     
     return {"message": "OTP verified"}
 
+def apply_password_reset(db: Session, user_id: int, otp: str, new_hash: str):
+    """Store the new hash, clear the OTP and sign out every session; False if the OTP was used meanwhile."""
+    user = db.get(models.User, user_id)
+    if user is None or user.reset_otp != otp:
+        return False
+    user.password = new_hash
+    user.reset_otp = None # Clear OTP after use
+    user.otp_expiry = None
+    # Sign out every existing session
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    auth.tokens_revoked(user.email, user.token_version)
+    return True
+
 @app.post("/auth/reset-password")
-def reset_password(request: schemas.ResetPasswordRequest, db: Session = Depends(database.get_db)):
+async def reset_password(request: schemas.ResetPasswordRequest, db: Session = Depends(database.get_db)):
     # Frontend passes 'token' as the OTP in verifyOtp then 'token' again in resetPassword
     # Looking at AuthContext.jsx: 
     # verifyOtp sends {email, otp}
@@ -213,35 +313,117 @@ def reset_password(request: schemas.ResetPasswordRequest, db: Session = Depends(
     # In ForgotPasswordPage.jsx, it doesn't even use verifyOtp yet? 
     # Actually, let's assume 'token' in ResetPasswordRequest is the OTP.
     
-    user = db.query(models.User).filter(models.User.reset_otp == request.token).first()
-    if not user or (user.otp_expiry and user.otp_expiry < datetime.utcnow()):
-        raise HTTPException(status_code=400, detail="Invalid token or expired OTP")
-    
-    user.password = auth.get_password_hash(request.new_password)
-    user.reset_otp = None # Clear OTP after use
-    user.otp_expiry = None
-    db.commit()
+    async with auth.AUTH_SLOTS:
+        account = await run_in_threadpool(
+            first_row, db, db.query(models.User.id, models.User.otp_expiry).filter(models.User.reset_otp == request.token)
+        )
+        if not account or (account.otp_expiry and account.otp_expiry < datetime.utcnow()):
+            raise HTTPException(status_code=400, detail="Invalid token or expired OTP")
+        
+        new_hash = await auth.hash_password_async(request.new_password)
+        if not await run_in_threadpool(apply_password_reset, db, account.id, request.token, new_hash):
+            raise HTTPException(status_code=400, detail="Invalid token or expired OTP")
     
     return {"message": "Password reset successfully"}
 
-@app.get("/courses", response_model=List[dict])
-def get_all_courses(q: Optional[str] = None, db: Session = Depends(database.get_db)):
+# Explore feed: every field a client can ask for with ?fields=
+COURSE_FEED_FIELDS = (
+    "id", "_id", "title", "description", "thumbnail", "price", "status",
+    "instructor_id", "enrolledStudents", "enrolmentCount", "progress", "instructor"
+)
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/courses")
+def get_all_courses(
+    request: Request,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Published courses. Without cursor/limit this is the full list, as before.
+    With them it returns {"items", "nextCursor"} pages in id order; pass
+    nextCursor back to get the following page. Paged items carry
+    enrolmentCount instead of the enrolledStudents id list unless `fields`
+    (comma-separated) asks for it.
+    """
+    paginated = cursor is not None or limit is not None
+    if fields:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = wanted.difference(COURSE_FEED_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    elif paginated:
+        wanted = set(COURSE_FEED_FIELDS) - {"enrolledStudents"}
+    else:
+        wanted = set(COURSE_FEED_FIELDS)
+
+    # The feed only changes with the catalog or the enrolments, so revalidate
+    # from those before running the course queries (version read first: it
+    # must never be newer than the rows the body is built from)
+    catalog_version = _catalog_version
+    enrolment_state = None
+    if wanted & {"enrolledStudents", "enrolmentCount"}:
+        enrolment_state = tuple(db.query(func.count(models.Enrolment.id), func.max(models.Enrolment.id)).one())
+    etag = etags.version_etag("courses", catalog_version, enrolment_state, request.url.query)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+
     # Only return published courses for the general explore feed
     query = db.query(models.Course).filter(models.Course.status == "Published")
     
     if q:
-        query = query.filter(
-            or_(
-                models.Course.title.ilike(f"%{q}%"),
-                models.Course.description.ilike(f"%{q}%")
-            )
+        # Ranked best match first; pages stay in id order so the cursor holds
+        query = search.apply_course_search(query, q, ranked=not paginated)
+
+    page_size = limit or DEFAULT_PAGE_SIZE
+    if paginated:
+        # Keyset pagination: ids only grow, so "id > last seen" is stable under inserts
+        if cursor is not None:
+            query = query.filter(models.Course.id > decode_cursor(cursor))
+        query = query.order_by(models.Course.id).limit(page_size + 1)
+    
+    # Instructor joined into the course query, enrolments fetched for all
+    # matching courses at once: a fixed number of queries however big the catalog is
+    course_query = query.options(joinedload(models.Course.instructor)) if "instructor" in wanted else query
+    courses = course_query.all()
+    matching_ids = query.with_entities(models.Course.id)
+    enrolled = {}
+    counts = {}
+    if "enrolledStudents" in wanted:
+        enrolment_rows = db.query(models.Enrolment.course_id, models.Enrolment.user_id).filter(
+            models.Enrolment.course_id.in_(matching_ids)
         )
-    
-    courses = query.all()
+        for course_id, user_id in enrolment_rows:
+            enrolled.setdefault(course_id, []).append(user_id)
+        counts = {course_id: len(user_ids) for course_id, user_ids in enrolled.items()}
+    elif "enrolmentCount" in wanted:
+        counts = dict(
+            db.query(models.Enrolment.course_id, func.count(models.Enrolment.id))
+            .filter(models.Enrolment.course_id.in_(matching_ids))
+            .group_by(models.Enrolment.course_id)
+        )
+
+    next_cursor = None
+    if paginated and len(courses) > page_size:
+        courses = courses[:page_size]
+        next_cursor = encode_cursor(courses[-1].id)
     
     result = []
     for c in courses:
-        result.append({
+        item = {
             "id": c.id,
             "_id": c.id,
             "title": c.title,
@@ -250,11 +432,16 @@ def get_all_courses(q: Optional[str] = None, db: Session = Depends(database.get_
             "price": c.price,
             "status": c.status,
             "instructor_id": c.instructor_id,
-            "enrolledStudents": [e.user_id for e in c.enrolments],
+            "enrolledStudents": enrolled.get(c.id, []),
+            "enrolmentCount": counts.get(c.id, 0),
             "progress": 0,
-            "instructor": schemas.UserResponse.from_orm(c.instructor) if c.instructor else None
-        })
-    return result
+            "instructor": schemas.UserResponse.from_orm(c.instructor) if "instructor" in wanted and c.instructor else None
+        }
+        result.append({key: value for key, value in item.items() if key in wanted})
+
+    if paginated:
+        return etags.conditional_json(request, {"items": result, "nextCursor": next_cursor}, etag)
+    return etags.conditional_json(request, result, etag)
 
 @app.get("/courses/my-courses", response_model=List[dict])
 def get_my_courses(
@@ -268,12 +455,11 @@ def get_my_courses(
         query = db.query(models.Course).filter(models.Course.instructor_id == user_id)
     else:
         # Get courses the user is enrolled in
-        enrolments = db.query(models.Enrolment).filter(models.Enrolment.user_id == user_id).all()
-        course_ids = [e.course_id for e in enrolments]
+        enrolled_course_ids = db.query(models.Enrolment.course_id).filter(models.Enrolment.user_id == user_id)
         
         # Learners should ONLY see 'Published' courses in their learning list
         query = db.query(models.Course).filter(
-            models.Course.id.in_(course_ids),
+            models.Course.id.in_(enrolled_course_ids),
             models.Course.status == "Published"
         )
     
@@ -281,27 +467,36 @@ def get_my_courses(
         query = query.filter(models.Course.status == status)
     
     if q:
-        query = query.filter(
-            or_(
-                models.Course.title.ilike(f"%{q}%"),
-                models.Course.description.ilike(f"%{q}%")
-            )
+        query = search.apply_course_search(query, q)
+
+    # Fixed number of queries for any number of courses: the courses with their
+    # instructors, everyone enrolled in them, and (for learners) progress
+    courses = query.options(joinedload(models.Course.instructor)).all()
+    matching_ids = query.with_entities(models.Course.id)
+
+    enrolled = {}
+    enrolment_rows = db.query(models.Enrolment.course_id, models.Enrolment.user_id).join(
+        models.User, models.User.id == models.Enrolment.user_id
+    ).filter(models.Enrolment.course_id.in_(matching_ids))
+    for course_id, enrolled_user_id in enrolment_rows:
+        enrolled.setdefault(course_id, []).append(enrolled_user_id)
+
+    # Progress comes from the materialized per-enrolment rows
+    progress_by_course = {}
+    if current_user["role"] == "learner":
+        progress_rows = db.query(
+            models.EnrolmentProgress.course_id,
+            models.EnrolmentProgress.completed_modules,
+            models.EnrolmentProgress.total_modules
+        ).filter(
+            models.EnrolmentProgress.user_id == user_id,
+            models.EnrolmentProgress.course_id.in_(matching_ids)
         )
-
-    courses = query.all()
+        for course_id, completed_modules, total_modules in progress_rows:
+            progress_by_course[course_id] = progress.percentage(completed_modules, total_modules)
     
     result = []
     for c in courses:
-        progress = 0
-        if current_user["role"] == "learner":
-            total_modules = len(c.modules)
-            if total_modules > 0:
-                completed_modules = db.query(models.QuizResult.module_id).filter(
-                    models.QuizResult.user_id == user_id,
-                    models.QuizResult.module_id.in_([m.id for m in c.modules])
-                ).distinct().count()
-                progress = int((completed_modules / total_modules) * 100)
-                
         result.append({
             "id": c.id,
             "_id": c.id,
@@ -311,8 +506,8 @@ def get_my_courses(
             "price": c.price,
             "status": c.status,
             "instructor_id": c.instructor_id,
-            "enrolledStudents": [e.user_id for e in c.enrolments if e.user],
-            "progress": progress,
+            "enrolledStudents": enrolled.get(c.id, []),
+            "progress": progress_by_course.get(c.id, 0),
             "instructor": schemas.UserResponse.from_orm(c.instructor) if c.instructor else None
         })
     return result
@@ -389,19 +584,16 @@ def create_course(course: schemas.CourseCreate, current_user: dict = Depends(aut
                 db.add(new_opt)
     
     # Notify all learners about the new course
-    learners = db.query(models.User).filter(models.User.role == "learner").all()
-    for learner in learners:
-        notif = models.Notification(
-            user_id=learner.id,
-            title="New Course Available",
-            message=f"A new course '{new_course.title}' has been published. Check it out!",
-            type="course_launch",
-            is_read=False,
-            created_at=datetime.utcnow()
-        )
-        db.add(notif)
+    notifications.broadcast(
+        db, "learner",
+        title="New Course Available",
+        message=f"A new course '{new_course.title}' has been published. Check it out!",
+        type="course_launch"
+    )
 
     db.commit()
+    invalidate_course_detail(new_course.id)
+    sync_course_index(new_course)
     return {**schemas.CourseResponse.from_orm(new_course).dict(), "_id": new_course.id}
 
 @app.put("/courses/{course_id}/status")
@@ -416,18 +608,17 @@ def update_course_status(course_id: int, status_update: dict, current_user: dict
     
     course.status = status_update.get("status", "Draft")
     db.commit()
+    invalidate_course_detail(course_id)
+    sync_course_index(course)
 
     # If status is Published, notify all learners
     if course.status == "Published":
-        learners = db.query(models.User).filter(models.User.role == "learner").all()
-        for learner in learners:
-            notification = models.Notification(
-                user_id=learner.id,
-                title="New Course Launched!",
-                message=f"Instructor {current_user['name']} has launched a new course: {course.title}",
-                type="course_launch"
-            )
-            db.add(notification)
+        notifications.broadcast(
+            db, "learner",
+            title="New Course Launched!",
+            message=f"Instructor {current_user['name']} has launched a new course: {course.title}",
+            type="course_launch"
+        )
         db.commit()
 
     return {"message": "Status updated", "status": course.status}
@@ -455,10 +646,10 @@ def update_course(course_id: int, course_update: schemas.CourseUpdate, current_u
     incoming_module_ids = [m.id for m in course_update.modules if m.id is not None]
     
     # Delete modules not in update
-    db.query(models.Module).filter(
+    modules_changed = db.query(models.Module).filter(
         models.Module.course_id == course_id,
         ~models.Module.id.in_(incoming_module_ids)
-    ).delete(synchronize_session=False)
+    ).delete(synchronize_session=False) > 0
     
     for mod_data in course_update.modules:
         if mod_data.id:
@@ -474,6 +665,7 @@ def update_course(course_id: int, course_update: schemas.CourseUpdate, current_u
             )
             db.add(db_module)
             db.flush()
+            modules_changed = True
             
         # Handle Quiz for this module
         incoming_q_ids = [q.id for q in mod_data.quiz if q.id is not None]
@@ -536,7 +728,14 @@ def update_course(course_id: int, course_update: schemas.CourseUpdate, current_u
             for opt_data in q_data.options:
                 db.add(models.QuestionOption(text=opt_data.text, question_id=db_q.id))
 
+    # Module totals changed for everyone enrolled
+    if modules_changed:
+        db.flush()
+        progress.refresh_course(db, course_id)
+
     db.commit()
+    invalidate_course_detail(course_id)
+    sync_course_index(db_course)
     return {"message": "Course updated successfully"}
 
 @app.delete("/courses/{course_id}")
@@ -554,102 +753,225 @@ def delete_course(course_id: int, current_user: dict = Depends(auth.get_current_
     # Deletion is handled by cascades in models.py
     db.delete(db_course)
     db.commit()
+    invalidate_course_detail(course_id)
+
+    try:
+        rag.remove_course(course_id)
+    except Exception as e:
+        print(f"Failed to remove course {course_id} from RAG index: {e}")
     return {"message": "Course deleted successfully"}
 
 import traceback
 
-@app.get("/courses/my-learners", response_model=List[dict])
-def get_my_learners(current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+LEARNER_SORTS = ("enrolled", "name", "progress")
+
+def enrolment_progress_query(db, instructor_id):
+    """
+    One row per enrolment in the instructor's courses with its progress:
+    modules with a quiz result / modules in the course, as a whole percentage.
+    """
+    stored = models.EnrolmentProgress
+    progress_pct = case(
+        (func.coalesce(stored.total_modules, 0) > 0,
+         func.coalesce(stored.completed_modules, 0) * 100 // stored.total_modules),
+        else_=0
+    )
+    return db.query(
+        models.Enrolment.id.label("enrolment_id"),
+        models.Enrolment.user_id.label("user_id"),
+        models.Enrolment.accessibility_enabled.label("accessibility_enabled"),
+        models.Course.title.label("course_title"),
+        progress_pct.label("progress")
+    ).join(models.Course, models.Course.id == models.Enrolment.course_id).join(
+        models.User, models.User.id == models.Enrolment.user_id
+    ).outerjoin(
+        stored, stored.enrolment_id == models.Enrolment.id
+    ).filter(models.Course.instructor_id == instructor_id)
+
+@app.get("/courses/my-learners")
+def get_my_learners(
+    sort: str = "enrolled",
+    order: str = "asc",
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(auth.get_current_user),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Learners enrolled in the instructor's courses, with their average progress.
+    sort: enrolled (first enrolment, the default), name or progress; order: asc or desc.
+    Without limit this is the full list; with it, {"items", "total", "limit", "offset"}.
+    """
+    if current_user["role"] != "instructor":
+        raise HTTPException(status_code=403, detail="Only instructors can access learner reports")
+    if sort not in LEARNER_SORTS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(LEARNER_SORTS)} and order asc or desc")
+
     try:
-        if current_user["role"] != "instructor":
-            raise HTTPException(status_code=403, detail="Only instructors can access learner reports")
-        
         instructor_id = current_user["id"]
         
-        # Courses owned by this instructor
-        my_courses = db.query(models.Course).filter(models.Course.instructor_id == instructor_id).all()
-        my_course_ids = [c.id for c in my_courses]
-        
-        # Find all enrollments for these courses
-        relevant_enrolments = db.query(models.Enrolment).filter(models.Enrolment.course_id.in_(my_course_ids)).all()
-        
-        # Group by student and calculate progress
-        student_map = {}
-        for e in relevant_enrolments:
-            student = e.user
-            course = e.course
-            
-            if not student or not course:
-                continue
-                
-            # Get total modules in this course to calculate progress for this specific course/student pair
-            total_modules = len(course.modules)
-            course_progress = 0
-            if total_modules > 0:
-                completed_modules = db.query(models.QuizResult.module_id).filter(
-                    models.QuizResult.user_id == student.id,
-                    models.QuizResult.module_id.in_([m.id for m in course.modules])
-                ).distinct().count()
-                course_progress = int((completed_modules / total_modules) * 100)
-
-            # Create student entry if it doesn't exist
-            if student.id not in student_map:
-                student_map[student.id] = {
-                    "id": student.id,
-                    "name": student.name or "User",
-                    "email": student.email,
-                    "courses": [],
-                    "progress_total": 0,
-                    "course_count": 0,
-                    "badges": [],
-                    "status": "Active",
-                    "accessibility_enabled": e.accessibility_enabled,
-                    "enrolment_id": e.id,
-                    "lastActive": student.created_at.strftime("%Y-%m-%d") if student.created_at else "Recently",
-                    "avatar": student.name[0].upper() if (student.name and len(student.name) > 0) else "U"
-                }
-            
-            student_data = student_map[student.id]
-            student_data["courses"].append(course.title)
-            student_data["progress_total"] += course_progress
-            student_data["course_count"] += 1
-            if course_progress == 100 and "Legend" not in student_data["badges"]:
-                student_data["badges"].append("Legend")
-
-        # Finalize progress (average)
+        # Per-student averages are aggregated in SQL, so sorting and paging
+        # happen before any per-learner detail is loaded
+        pairs = enrolment_progress_query(db, instructor_id).subquery()
+        students = db.query(
+            models.User.id,
+            models.User.name,
+            models.User.email,
+            models.User.created_at,
+            (func.sum(pairs.c.progress) // func.count()).label("progress"),
+            func.min(pairs.c.enrolment_id).label("first_enrolment_id")
+        ).join(pairs, pairs.c.user_id == models.User.id).group_by(models.User.id)
+
+        sort_key = {
+            "enrolled": func.min(pairs.c.enrolment_id),
+            "name": func.lower(func.coalesce(models.User.name, "")),
+            "progress": func.sum(pairs.c.progress) // func.count()
+        }[sort]
+        students = students.order_by(sort_key.desc() if order == "desc" else sort_key, models.User.id)
+        total = students.count() if limit is not None else None
+        if limit is not None:
+            students = students.offset(offset).limit(limit)
+        students = students.all()
+
+        # Course titles and enrolment flags for just the learners on this page
+        details = {}
+        if students:
+            page_pairs = db.query(pairs).filter(
+                pairs.c.user_id.in_([s.id for s in students])
+            ).order_by(pairs.c.enrolment_id)
+            for row in page_pairs:
+                details.setdefault(row.user_id, []).append(row)
+
         result = []
-        for s_id, data in student_map.items():
-            progress_total = data.get("progress_total", 0)
-            course_count = data.get("course_count", 0)
-            data["progress"] = int(progress_total / course_count) if course_count > 0 else 0
-            if not data["badges"]:
-                data["badges"] = ["Newbie"]
-            # Remove intermediate fields
-            data.pop("progress_total", None)
-            data.pop("course_count", None)
-            result.append(data)
+        for student in students:
+            rows = details.get(student.id, [])
+            first = next((row for row in rows if row.enrolment_id == student.first_enrolment_id), rows[0])
+            badges = ["Legend"] if any(row.progress == 100 for row in rows) else ["Newbie"]
+            result.append({
+                "id": student.id,
+                "name": student.name or "User",
+                "email": student.email,
+                "courses": [row.course_title for row in rows],
+                "badges": badges,
+                "status": "Active",
+                "accessibility_enabled": first.accessibility_enabled,
+                "enrolment_id": first.enrolment_id,
+                "lastActive": student.created_at.strftime("%Y-%m-%d") if student.created_at else "Recently",
+                "avatar": student.name[0].upper() if (student.name and len(student.name) > 0) else "U",
+                "progress": student.progress
+            })
         
+        if limit is not None:
+            return {"items": result, "total": total, "limit": limit, "offset": offset}
         return result
     except Exception as e:
         print("ERROR in get_my_learners:")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Serialized course structure (everything in GET /courses/{id} that is the same for
+# every viewer) and its content hash, keyed by (course_id, version, owner_view). invalidate_course_detail
+# bumps the version, so a payload built from data read before a change can never be
+# served after it.
+COURSE_DETAIL_CACHE = TTLCache(
+    maxsize=int(os.getenv("COURSE_CACHE_SIZE", "512")),
+    ttl=int(os.getenv("COURSE_CACHE_TTL", "600"))
+)
+_course_versions = {}
+_course_versions_lock = threading.Lock()
+# Bumped with any course's version: the catalog ETag for GET /courses
+_catalog_version = 0
+
+def invalidate_course_detail(course_id: int):
+    """Call after a course is created, its details, modules, questions or status change, or it is deleted."""
+    global _catalog_version
+    with _course_versions_lock:
+        version = _course_versions.get(course_id, 0)
+        _course_versions[course_id] = version + 1
+        _catalog_version += 1
+    for owner_view in (False, True):
+        COURSE_DETAIL_CACHE.pop((course_id, version, owner_view))
+
+def course_structure_json(db: Session, course_id: int, owner_view: bool):
+    """
+    JSON object for the course's fields, modules and assessment (answers only in
+    the owner's view), with a sha1 of it for ETags: (payload, digest).
+    """
+    key = (course_id, _course_versions.get(course_id, 0), owner_view)
+    cached = COURSE_DETAIL_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    course = db.query(models.Course).options(
+        joinedload(models.Course.instructor),
+        selectinload(models.Course.modules).selectinload(models.Module.quiz).selectinload(models.Question.options),
+        selectinload(models.Course.assessment).selectinload(models.Question.options)
+    ).filter(models.Course.id == course_id).first()
+    payload = json.dumps({
+        "id": course.id,
+        "_id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "thumbnail": course.thumbnail,
+        "price": course.price,
+        "status": course.status,
+        "instructor_id": course.instructor_id,
+        "instructor": {
+            "id": course.instructor.id if course.instructor else None,
+            "name": course.instructor.name if course.instructor else "Unknown",
+            "email": course.instructor.email if course.instructor else ""
+        },
+        "modules": [
+            {
+                "id": m.id,
+                "title": m.title,
+                "contentLink": m.contentLink,
+                "quiz": [
+                    {
+                        "id": q.id,
+                        "questionText": q.questionText,
+                        "questionType": q.questionType,
+                        "options": [{"text": o.text} for o in q.options]
+                        # Removed correctOptionIndex for learner security
+                    } for q in m.quiz
+                ]
+            } for m in course.modules
+        ],
+        "assessment": [
+            {
+                "id": q.id,
+                "questionText": q.questionText,
+                "questionType": q.questionType,
+                "options": [{"text": o.text} for o in q.options],
+                # Only instructor sees answers and difficulty in course view
+                **({
+                    "correctOptionIndex": q.correctOptionIndex,
+                    "correctAnswerText": q.correctAnswerText,
+                    "difficulty": q.difficulty
+                } if owner_view else {})
+            } for q in course.assessment
+        ]
+    }).encode()
+    cached = (payload, hashlib.sha1(payload).digest())
+    COURSE_DETAIL_CACHE.set(key, cached)
+    return cached
+
 @app.get("/courses/{course_id}")
-def get_course(course_id: int, current_user_opt: Optional[dict] = Depends(auth.get_current_user_optional), db: Session = Depends(database.get_db)):
+def get_course(course_id: int, request: Request, current_user_opt: Optional[dict] = Depends(auth.get_current_user_optional), db: Session = Depends(database.get_db)):
     try:
-        course = db.query(models.Course).filter(models.Course.id == course_id).first()
+        course = db.query(models.Course.status, models.Course.instructor_id).filter(models.Course.id == course_id).first()
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
+        is_owner = bool(current_user_opt and current_user_opt.get("role") == "instructor" and course.instructor_id == current_user_opt.get("id"))
+        is_learner = bool(current_user_opt and current_user_opt.get("role") == "learner")
+
         # Security: If not published and user is not the instructor, deny access
-        if course.status != "Published":
-            is_instructor = current_user_opt and current_user_opt.get("role") == "instructor" and course.instructor_id == current_user_opt.get("id")
-            if not is_instructor:
-                raise HTTPException(status_code=403, detail="This course is currently not available (Draft/Archived)")
+        if course.status != "Published" and not is_owner:
+            raise HTTPException(status_code=403, detail="This course is currently not available (Draft/Archived)")
         
         # Batch Timing Check for Learners
-        if current_user_opt and current_user_opt.get("role") == "learner":
+        if is_learner:
             user_id = current_user_opt.get("id")
             # Find if user is in any batch for this specific course
             batch = db.query(models.Batch).join(models.Batch.students).filter(
@@ -670,60 +992,33 @@ def get_course(course_id: int, current_user_opt: Optional[dict] = Depends(auth.g
                         detail=f"Your batch access ended at {batch.end_time.strftime('%Y-%m-%d %H:%M:%S')} UTC"
                     )
         
-        return {
-            "id": course.id,
-            "_id": course.id,
-            "title": course.title,
-            "description": course.description,
-            "thumbnail": course.thumbnail,
-            "price": course.price,
-            "status": course.status,
-            "instructor_id": course.instructor_id,
-            "enrolledStudents": [e.user_id for e in course.enrolments if e.user],
-            "instructor": {
-                "id": course.instructor.id if course.instructor else None,
-                "name": course.instructor.name if course.instructor else "Unknown",
-                "email": course.instructor.email if course.instructor else ""
-            },
-                "modules": [
-                    {
-                        "id": m.id,
-                        "title": m.title,
-                        "contentLink": m.contentLink,
-                        "quiz": [
-                            {
-                                "id": q.id,
-                                "questionText": q.questionText,
-                                "questionType": q.questionType,
-                                "options": [{"text": o.text} for o in q.options]
-                                # Removed correctOptionIndex for learner security
-                            } for q in m.quiz
-                        ]
-                    } for m in course.modules
-                ],
-                "assessment": [
-                    {
-                        "id": q.id,
-                        "questionText": q.questionText,
-                        "questionType": q.questionType,
-                        "options": [{"text": o.text} for o in q.options],
-                        # Only instructor sees answers and difficulty in course view
-                        **({
-                            "correctOptionIndex": q.correctOptionIndex,
-                            "correctAnswerText": q.correctAnswerText,
-                            "difficulty": q.difficulty
-                        } if (current_user_opt and current_user_opt.get("role") == "instructor" and course.instructor_id == current_user_opt.get("id")) else {})
-                    } for q in course.assessment
-                ],
-                "isAssessmentCompleted": db.query(models.QuizResult).filter(
+        # Per-request parts: enrolments and the viewer's own flags
+        enrolled = db.query(models.Enrolment.user_id).join(
+            models.User, models.User.id == models.Enrolment.user_id
+        ).filter(models.Enrolment.course_id == course_id).order_by(models.Enrolment.id).all()
+        is_completed, has_certificate = False, False
+        if is_learner:
+            is_completed, has_certificate = db.query(
+                db.query(models.QuizResult.id).filter(
                     models.QuizResult.user_id == current_user_opt.get("id"),
                     models.QuizResult.course_id == course_id
-                ).first() is not None if (current_user_opt and current_user_opt.get("role") == "learner") else False,
-                "hasCertificate": db.query(models.Certificate).filter(
+                ).exists(),
+                db.query(models.Certificate.id).filter(
                     models.Certificate.user_id == current_user_opt.get("id"),
                     models.Certificate.course_id == course_id
-                ).first() is not None if (current_user_opt and current_user_opt.get("role") == "learner") else False
-        }
+                ).exists()
+            ).one()
+
+        viewer = json.dumps({
+            "enrolledStudents": [user_id for (user_id,) in enrolled],
+            "isAssessmentCompleted": bool(is_completed),
+            "hasCertificate": bool(has_certificate)
+        }).encode()
+        structure, digest = course_structure_json(db, course_id, is_owner)
+        # Splice the two JSON objects: {...structure, ...viewer}
+        return etags.json_response(request, structure[:-1] + b", " + viewer[1:], etags.make_etag(digest, viewer))
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         with open("backend_errors.log", "a") as f:
@@ -752,6 +1047,8 @@ def enroll_in_course(course_id: int, current_user: dict = Depends(auth.get_curre
         course_id=course_id
     )
     db.add(new_enrolment)
+    db.flush()
+    progress.refresh(db, current_user["id"], course_id)
     db.commit()
     
     return {"message": "Enrolled successfully"}
@@ -826,8 +1123,6 @@ def submit_quiz_result(module_id: int, result: schemas.QuizResultCreate, current
             existing_result.total_questions = total_questions
             existing_result.answers = result.answers
             existing_result.completed_at = datetime.utcnow()
-            db.commit()
-            db.refresh(existing_result)
             new_result = existing_result
         else:
             new_result = models.QuizResult(
@@ -838,17 +1133,27 @@ def submit_quiz_result(module_id: int, result: schemas.QuizResultCreate, current
                 answers=result.answers
             )
             db.add(new_result)
-            db.commit()
-            db.refresh(new_result)
+        # Result and materialized progress commit together
+        db.flush()
+        progress.refresh(db, current_user["id"], module.course_id)
+        db.commit()
+        db.refresh(new_result)
 
         # Check for course completion and award badge
         course = module.course
+        course_progress = db.query(models.EnrolmentProgress).filter(
+            models.EnrolmentProgress.user_id == current_user["id"],
+            models.EnrolmentProgress.course_id == module.course_id
+        ).first()
         if course:
-            total_modules = len(course.modules)
-            completed_modules = db.query(models.QuizResult.module_id).filter(
-                models.QuizResult.user_id == current_user["id"],
-                models.QuizResult.module_id.in_([m.id for m in course.modules])
-            ).distinct().count()
+            if course_progress:
+                total_modules = course_progress.total_modules
+                completed_modules = course_progress.completed_modules
+                avg = course_progress.module_quiz_avg
+            else:
+                # Module quizzes don't require enrolment; such learners still earn the badge and batch
+                total_modules = len(course.modules)
+                completed_modules, avg = progress.module_stats(db, current_user["id"], course.id)
 
             if total_modules > 0 and completed_modules == total_modules:
                 # Award Badge
@@ -869,20 +1174,7 @@ def submit_quiz_result(module_id: int, result: schemas.QuizResultCreate, current
                     db.add(notif)
                 
                 # Batch logic
-                quiz_results = db.query(models.QuizResult).filter(
-                    models.QuizResult.user_id == user_id,
-                    models.QuizResult.module_id.in_([m.id for m in course.modules])
-                ).all()
-                
-                t_score = 0
-                t_count = 0
-                for qr in quiz_results:
-                    if qr.total_questions and qr.total_questions > 0:
-                        t_score += (qr.score / qr.total_questions) * 100
-                        t_count += 1
-                
-                if t_count > 0:
-                    avg = t_score / t_count
+                if avg is not None:
                     b_name = "Bronze"
                     if avg >= 90: b_name = "Diamond"
                     elif avg >= 80: b_name = "Gold"
@@ -932,7 +1224,22 @@ def submit_quiz_result(module_id: int, result: schemas.QuizResultCreate, current
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/quizzes/{course_id}")
-def get_quiz_questions(course_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+def get_quiz_questions(course_id: int, request: Request, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    # The response depends on the course's questions (versioned) and the viewer's
+    # results, certificate and enrolment; revalidate from those alone
+    version = _course_versions.get(course_id, 0)
+    user_id = current_user["id"]
+    result_filter = (models.QuizResult.user_id == user_id, models.QuizResult.course_id == course_id)
+    viewer_state = tuple(db.query(
+        db.query(func.count(models.QuizResult.id)).filter(*result_filter).scalar_subquery(),
+        db.query(func.max(models.QuizResult.id)).filter(*result_filter).scalar_subquery(),
+        db.query(models.Certificate.id).filter(models.Certificate.user_id == user_id, models.Certificate.course_id == course_id).exists(),
+        db.query(models.Enrolment.id).filter(models.Enrolment.user_id == user_id, models.Enrolment.course_id == course_id).exists()
+    ).one())
+    etag = etags.version_etag("quiz", course_id, version, user_id, viewer_state)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+
     # Fetch all results for this course/user
     existing_results = db.query(models.QuizResult).filter(
         models.QuizResult.user_id == current_user["id"],
@@ -955,7 +1262,7 @@ def get_quiz_questions(course_id: int, current_user: dict = Depends(auth.get_cur
             else:
                 sorted_review_questions = db.query(models.Question).filter(models.Question.course_id == course_id).all()
             
-            return {
+            return etags.conditional_json(request, {
                 "completed": True,
                 "score": latest_result.score,
                 "totalQuestions": latest_result.total_questions,
@@ -973,7 +1280,7 @@ def get_quiz_questions(course_id: int, current_user: dict = Depends(auth.get_cur
                         "correctAnswerText": q.correctAnswerText
                     } for q in sorted_review_questions
                 ]
-            }
+            }, etag)
 
     # If first time or retake allowed
     # Check enrollment
@@ -987,7 +1294,7 @@ def get_quiz_questions(course_id: int, current_user: dict = Depends(auth.get_cur
     # Use only instructor created questions
     questions = db.query(models.Question).filter(models.Question.course_id == course_id).all()
     
-    return {
+    return etags.conditional_json(request, {
         "questions": [
             {
                 "id": q.id,
@@ -996,7 +1303,7 @@ def get_quiz_questions(course_id: int, current_user: dict = Depends(auth.get_cur
                 "options": [{"text": o.text} for o in q.options],
             } for q in questions
         ]
-    }
+    }, etag)
 
 @app.post("/quizzes/{course_id}/adaptive/start")
 def start_adaptive_quiz(course_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
@@ -1188,6 +1495,8 @@ def submit_course_quiz(course_id: int, request: schemas.QuizSubmitRequest, curre
         question_ids = request.question_ids if request.is_adaptive else [q.id for q in sorted_questions]
     )
     db.add(res)
+    db.flush()
+    progress.refresh(db, current_user["id"], course_id)
     db.commit()
     
     badge_awarded = False
@@ -1233,7 +1542,7 @@ def submit_course_quiz(course_id: int, request: schemas.QuizSubmitRequest, curre
 # Notifications
 @app.get("/notifications", response_model=List[schemas.Notification])
 def get_notifications(current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
-    return db.query(models.Notification).filter(models.Notification.user_id == current_user["id"]).order_by(models.Notification.created_at.desc()).all()
+    return notifications.for_user(db, current_user["id"], current_user["role"])
 
 @app.put("/notifications/{notif_id}/read")
 def mark_notification_read(notif_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
@@ -1246,6 +1555,12 @@ def mark_notification_read(notif_id: int, current_user: dict = Depends(auth.get_
         db.commit()
     return {"message": "Notification marked as read"}
 
+@app.put("/notifications/broadcasts/{broadcast_id}/read")
+def mark_broadcast_read(broadcast_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    if notifications.mark_read(db, broadcast_id, current_user["id"], current_user["role"]):
+        db.commit()
+    return {"message": "Notification marked as read"}
+
 # Messaging
 @app.post("/messages", response_model=schemas.Message)
 def send_message(msg: schemas.MessageCreate, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
@@ -1348,8 +1663,14 @@ def get_my_badges(current_user: dict = Depends(auth.get_current_user), db: Sessi
     return user.badges
 
 @app.get("/badges/all", response_model=List[schemas.Badge])
-def get_all_badges(db: Session = Depends(database.get_db)):
-    return db.query(models.Badge).all()
+def get_all_badges(request: Request, db: Session = Depends(database.get_db)):
+    # Badges are only ever added, so their count and highest id identify the list
+    count, last_id = db.query(func.count(models.Badge.id), func.max(models.Badge.id)).one()
+    etag = etags.make_etag(f"badges:{count}:{last_id}".encode())
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    badges = db.query(models.Badge).all()
+    return etags.conditional_json(request, [schemas.Badge.model_validate(b) for b in badges], etag)
 
 
 # Certificates
@@ -1375,6 +1696,55 @@ def get_course_certificate(course_id: int, current_user: dict = Depends(auth.get
     
     return cert
 
+REPORT_HEADER = ["Student Name", "Email", "Progress (%)", "Module Quiz Avg (%)", "Final Assessment Status", "Final Grade (%)"]
+REPORT_BATCH_SIZE = 500
+
+def performance_report_rows(course_id: int):
+    """
+    Performance report CSV, yielded REPORT_BATCH_SIZE learners at a time from a
+    single streamed query. Uses its own session: the body is produced after the
+    request's session has been closed.
+    """
+    db = database.SessionLocal()
+    try:
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writerow(REPORT_HEADER)
+        yield flush()
+
+        P = models.EnrolmentProgress
+        rows = db.query(
+            models.User.name, models.User.email,
+            P.completed_modules, P.total_modules, P.module_quiz_avg, P.final_score, P.final_attempts
+        ).join(
+            models.Enrolment, models.Enrolment.user_id == models.User.id
+        ).outerjoin(
+            P, P.enrolment_id == models.Enrolment.id
+        ).filter(models.Enrolment.course_id == course_id).order_by(models.Enrolment.id).yield_per(REPORT_BATCH_SIZE)
+
+        for i, (name, email, completed, total, mod_avg, final_score, attempts) in enumerate(rows, 1):
+            writer.writerow([
+                name,
+                email,
+                f"{progress.percentage(completed or 0, total or 0)}%",
+                f"{int(mod_avg or 0)}%",
+                "Completed" if attempts else "Not Attempted",
+                f"{final_score}%" if attempts else "N/A"
+            ])
+            if i % REPORT_BATCH_SIZE == 0:
+                yield flush()
+        if buffer.tell():
+            yield flush()
+    finally:
+        db.close()
+
 @app.get("/courses/{course_id}/reports/performance")
 def get_performance_report(course_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
     if current_user["role"] != "instructor":
@@ -1387,63 +1757,98 @@ def get_performance_report(course_id: int, current_user: dict = Depends(auth.get
     if course.instructor_id != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to access reports for this course")
     
-    # 1. Fetch Enrolled Students
-    # Joining with Enrolment table to find all students for this course
-    enrolled_users = db.query(models.User).join(models.Enrolment).filter(models.Enrolment.course_id == course_id).all()
-    
-    # 2. Prepare CSV Header
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Student Name", "Email", "Progress (%)", "Module Quiz Avg (%)", "Final Assessment Status", "Final Grade (%)"])
-    
-    total_modules = len(course.modules)
-    
-    for student in enrolled_users:
-        # Progress: Completed modules / total modules
-        completed_results = db.query(models.QuizResult).filter(
-            models.QuizResult.user_id == student.id,
-            models.QuizResult.module_id.in_([m.id for m in course.modules])
-        ).all()
-        
-        completed_count = len(completed_results)
-        progress = (completed_count / total_modules * 100) if total_modules > 0 else 0
-        
-        # Module Average
-        quiz_scores = []
-        for r in completed_results:
-            if r.total_questions and r.total_questions > 0:
-                quiz_scores.append((r.score / r.total_questions) * 100)
-        
-        mod_avg = sum(quiz_scores) / len(quiz_scores) if quiz_scores else 0
-        
-        # Final Assessment
-        final_result = db.query(models.QuizResult).filter(
-            models.QuizResult.user_id == student.id,
-            models.QuizResult.course_id == course_id
-        ).first()
-        
-        final_status = "Completed" if final_result else "Not Attempted"
-        final_score = int((final_result.score / final_result.total_questions * 100) if final_result and final_result.total_questions and final_result.total_questions > 0 else 0)
-        
-        writer.writerow([
-            student.name,
-            student.email,
-            f"{int(progress)}%",
-            f"{int(mod_avg)}%",
-            final_status,
-            f"{final_score}%" if final_result else "N/A"
-        ])
-    
-    output.seek(0)
     sanitized_title = "".join(c for c in course.title if c.isalnum() or c in (" ", "_")).strip().replace(" ", "_")
     filename = f"Performance_Report_{sanitized_title}.csv"
     
     return StreamingResponse(
-        iter([output.getvalue()]),
+        performance_report_rows(course_id),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+def quiz_results_lines(course_ids: List[int]):
+    """
+    JSON Lines export of every quiz result of the learners enrolled in the given
+    courses: one object per module quiz or final assessment attempt, with
+    numeric scores and the submitted answers. Streamed like the CSV report.
+    """
+    db = database.SessionLocal()
+    try:
+        QR = models.QuizResult
+        result_course_id = func.coalesce(QR.course_id, models.Module.course_id)
+        rows = db.query(
+            models.Course.id, models.Course.title,
+            models.User.id, models.User.name, models.User.email,
+            models.Module.id, models.Module.title,
+            QR.id, QR.score, QR.total_questions, QR.answers, QR.completed_at
+        ).select_from(QR).outerjoin(
+            models.Module, models.Module.id == QR.module_id
+        ).join(
+            models.Enrolment, (models.Enrolment.user_id == QR.user_id) & (models.Enrolment.course_id == result_course_id)
+        ).join(
+            models.Course, models.Course.id == models.Enrolment.course_id
+        ).join(
+            models.User, models.User.id == QR.user_id
+        ).filter(
+            models.Enrolment.course_id.in_(course_ids)
+        ).order_by(models.Enrolment.course_id, models.Enrolment.id, QR.id).yield_per(REPORT_BATCH_SIZE)
+
+        lines = []
+        for (course_id, course_title, student_id, student_name, email, module_id, module_title,
+             result_id, score, total, answers, completed_at) in rows:
+            lines.append(json.dumps({
+                "course_id": course_id,
+                "course_title": course_title,
+                "student_id": student_id,
+                "student_name": student_name,
+                "email": email,
+                "type": "module" if module_id else "final",
+                "module_id": module_id,
+                "module_title": module_title,
+                "result_id": result_id,
+                "score": score,
+                "total_questions": total,
+                "percentage": round(score * 100 / total, 2) if total else 0.0,
+                "answers": answers,
+                "completed_at": completed_at.isoformat() if completed_at else None
+            }) + "\n")
+            if len(lines) == REPORT_BATCH_SIZE:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+    finally:
+        db.close()
+
+def results_export_response(course_ids: List[int], name: str):
+    return StreamingResponse(
+        quiz_results_lines(course_ids),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=Quiz_Results_{name}.jsonl"}
+    )
+
+@app.get("/courses/{course_id}/reports/results")
+def export_course_results(course_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    if current_user["role"] != "instructor":
+        raise HTTPException(status_code=403, detail="Only instructors can export quiz results")
+
+    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    if course.instructor_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to access reports for this course")
+
+    return results_export_response([course_id], f"Course_{course_id}")
+
+@app.get("/api/instructor/reports/results")
+def export_instructor_results(current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
+    if current_user["role"] != "instructor":
+        raise HTTPException(status_code=403, detail="Only instructors can export quiz results")
+
+    course_ids = [cid for (cid,) in db.query(models.Course.id).filter(models.Course.instructor_id == current_user["id"])]
+    return results_export_response(course_ids, "All_Courses")
+
 @app.get("/api/courses/{course_id}/feedback")
 def get_personalized_feedback(course_id: int, current_user: dict = Depends(auth.get_current_user), db: Session = Depends(database.get_db)):
     # 1. Verify Enrollment
@@ -1511,6 +1916,12 @@ def get_personalized_feedback(course_id: int, current_user: dict = Depends(auth.
     return {"feedback": feedback}
 
 if __name__ == "__main__":
+    import sys, types
     import uvicorn
+    # Spawned processes (uvicorn's reloader child, the password hashing pool)
+    # re-import the __main__ module. Give them an empty one, so they don't re-run
+    # this file's setup: tables, search index, progress backfill and RAG client.
+    # The server imports the app as "main:app" below.
+    sys.modules["__main__"] = types.ModuleType("__main__")
     print("Starting SQLAlchemy-based server on http://127.0.0.1:8000")
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
@@ -45,6 +45,14 @@ def migrate():
     except Exception as e:
         print(f"Error checking questions: {e}")
 
+    try:
+        columns = [col[1] for col in cursor.execute("PRAGMA table_info(users)").fetchall()]
+        if 'token_version' not in columns:
+            print("Adding token_version to users...")
+            cursor.execute("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0")
+    except Exception as e:
+        print(f"Error checking users: {e}")
+
     conn.commit()
     conn.close()
     print("Migration check complete.")
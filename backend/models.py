@@ -31,6 +31,7 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     reset_otp = Column(String, nullable=True)
     otp_expiry = Column(DateTime, nullable=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False) # Bumped to revoke all issued tokens
 
     courses = relationship("Course", back_populates="instructor")
     enrolments = relationship("Enrolment", back_populates="user")
@@ -105,6 +106,21 @@ class Enrolment(Base):
 
     user = relationship("User", back_populates="enrolments")
     course = relationship("Course", back_populates="enrolments")
+    progress = relationship("EnrolmentProgress", uselist=False, cascade="all, delete-orphan")
+
+class EnrolmentProgress(Base):
+    """Materialized progress per enrolment, maintained by progress.py whenever results or modules change."""
+    __tablename__ = "enrolment_progress"
+
+    enrolment_id = Column(Integer, ForeignKey("enrolments.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True)
+    completed_modules = Column(Integer, default=0)
+    total_modules = Column(Integer, default=0)
+    module_quiz_avg = Column(Float, nullable=True) # Mean module quiz percentage, None before any quiz
+    final_score = Column(Integer, nullable=True) # First final assessment attempt (%), None if not attempted
+    final_attempts = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
 class QuizResult(Base):
     __tablename__ = "quiz_results"
@@ -158,6 +174,25 @@ class Notification(Base):
 
     user = relationship("User", back_populates="notifications")
 
+class BroadcastNotification(Base):
+    """One announcement for every user with `role`, instead of one Notification row per user."""
+    __tablename__ = "broadcast_notifications"
+    id = Column(Integer, primary_key=True, index=True)
+    role = Column(String, index=True)
+    title = Column(String)
+    message = Column(String)
+    type = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    reads = relationship("BroadcastRead", cascade="all, delete-orphan")
+
+class BroadcastRead(Base):
+    """Read receipt: a row exists once the user has read the broadcast."""
+    __tablename__ = "broadcast_reads"
+    broadcast_id = Column(Integer, ForeignKey("broadcast_notifications.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    read_at = Column(DateTime, default=datetime.utcnow)
+
 class Message(Base):
     __tablename__ = "messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,59 @@
+"""
+Broadcast notifications: one announcement row per role instead of one
+Notification row per recipient.
+
+A broadcast is shown to every user with its role who registered before it
+was sent. Reading it adds a BroadcastRead receipt for that user only, so a
+launch costs one INSERT however many learners there are, and storage grows
+with what users actually read.
+"""
+from datetime import datetime
+from sqlalchemy import select, func
+import models
+
+def broadcast(db, role, title, message, type="info"):
+    """Announce to every user with `role`. Caller commits."""
+    notice = models.BroadcastNotification(role=role, title=title, message=message, type=type)
+    db.add(notice)
+    return notice
+
+def _visible_to(user_id, role):
+    """Filter for the broadcasts a user can see: their role, sent after they registered."""
+    joined = select(models.User.created_at).where(models.User.id == user_id).scalar_subquery()
+    return (
+        (models.BroadcastNotification.role == role)
+        & (models.BroadcastNotification.created_at >= func.coalesce(joined, models.BroadcastNotification.created_at))
+    )
+
+def for_user(db, user_id, role):
+    """The user's personal notifications and visible broadcasts, newest first, as Notification payloads."""
+    personal = db.query(models.Notification).filter(models.Notification.user_id == user_id).all()
+    broadcasts = db.query(
+        models.BroadcastNotification, models.BroadcastRead.user_id.isnot(None)
+    ).outerjoin(
+        models.BroadcastRead,
+        (models.BroadcastRead.broadcast_id == models.BroadcastNotification.id) & (models.BroadcastRead.user_id == user_id)
+    ).filter(_visible_to(user_id, role)).all()
+
+    items = [
+        {"id": n.id, "user_id": n.user_id, "title": n.title, "message": n.message, "type": n.type,
+         "is_read": bool(n.is_read), "created_at": n.created_at, "source": "personal"}
+        for n in personal
+    ] + [
+        {"id": b.id, "user_id": user_id, "title": b.title, "message": b.message, "type": b.type,
+         "is_read": is_read, "created_at": b.created_at, "source": "broadcast"}
+        for b, is_read in broadcasts
+    ]
+    items.sort(key=lambda item: item["created_at"] or datetime.min, reverse=True)
+    return items
+
+def mark_read(db, broadcast_id, user_id, role):
+    """Record that the user read a broadcast they can see; repeat calls are no-ops. Caller commits."""
+    visible = db.query(models.BroadcastNotification.id).filter(
+        models.BroadcastNotification.id == broadcast_id, _visible_to(user_id, role)
+    ).first()
+    if not visible:
+        return False
+    if not db.get(models.BroadcastRead, (broadcast_id, user_id)):
+        db.add(models.BroadcastRead(broadcast_id=broadcast_id, user_id=user_id))
+    return True
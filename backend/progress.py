@@ -0,0 +1,126 @@
+"""
+Materialized learner progress: one enrolment_progress row per enrolment.
+
+Rows are recomputed with set-based INSERT ... SELECT statements inside the
+caller's transaction, so they commit (or roll back) together with the quiz
+result or module change that triggered them:
+
+    refresh(db, user_id, course_id)   after a module quiz or final assessment submit
+    refresh_course(db, course_id)     after a course's modules were added or removed
+    backfill(engine)                  at startup, for enrolments that predate the table
+"""
+from datetime import datetime
+from sqlalchemy import select, insert, delete, case, func, null, literal, exists
+from sqlalchemy.orm import aliased
+import models
+
+Progress = models.EnrolmentProgress
+
+def percentage(completed, total):
+    """Whole-number progress percentage, as shown everywhere in the app."""
+    return int(completed * 100 // total) if total else 0
+
+def _progress_select(user_id=None, course_id=None, missing_only=False):
+    """Computed progress rows for the matching enrolments, in enrolment_progress column order."""
+    QR = models.QuizResult
+    Module = models.Module
+    Enrolment = models.Enrolment
+
+    module_totals = select(
+        Module.course_id, func.count(Module.id).label("total")
+    ).group_by(Module.course_id)
+    module_results = select(
+        QR.user_id,
+        Module.course_id,
+        func.count(func.distinct(QR.module_id)).label("completed"),
+        func.avg(case((QR.total_questions > 0, QR.score * 100.0 / QR.total_questions))).label("quiz_avg")
+    ).join(Module, Module.id == QR.module_id).group_by(QR.user_id, Module.course_id)
+    finals = select(
+        QR.user_id, QR.course_id, func.min(QR.id).label("first_id"), func.count(QR.id).label("attempts")
+    ).where(QR.module_id.is_(None), QR.course_id.isnot(None)).group_by(QR.user_id, QR.course_id)
+
+    # Aggregate only what the refresh needs
+    if course_id is not None:
+        module_totals = module_totals.where(Module.course_id == course_id)
+        module_results = module_results.where(Module.course_id == course_id)
+        finals = finals.where(QR.course_id == course_id)
+    if user_id is not None:
+        module_results = module_results.where(QR.user_id == user_id)
+        finals = finals.where(QR.user_id == user_id)
+    module_totals = module_totals.subquery()
+    module_results = module_results.subquery()
+    finals = finals.subquery()
+    first_final = aliased(QR)
+
+    query = select(
+        Enrolment.id,
+        Enrolment.user_id,
+        Enrolment.course_id,
+        func.coalesce(module_results.c.completed, 0),
+        func.coalesce(module_totals.c.total, 0),
+        module_results.c.quiz_avg,
+        case(
+            (first_final.id.is_(None), null()),
+            (first_final.total_questions > 0, first_final.score * 100 // first_final.total_questions),
+            else_=0
+        ),
+        func.coalesce(finals.c.attempts, 0),
+        literal(datetime.utcnow())
+    ).outerjoin(
+        module_totals, module_totals.c.course_id == Enrolment.course_id
+    ).outerjoin(
+        module_results,
+        (module_results.c.user_id == Enrolment.user_id) & (module_results.c.course_id == Enrolment.course_id)
+    ).outerjoin(
+        finals, (finals.c.user_id == Enrolment.user_id) & (finals.c.course_id == Enrolment.course_id)
+    ).outerjoin(first_final, first_final.id == finals.c.first_id)
+
+    if course_id is not None:
+        query = query.where(Enrolment.course_id == course_id)
+    if user_id is not None:
+        query = query.where(Enrolment.user_id == user_id)
+    if missing_only:
+        query = query.where(~exists().where(Progress.enrolment_id == Enrolment.id))
+    return query
+
+_COLUMNS = [
+    "enrolment_id", "user_id", "course_id", "completed_modules", "total_modules",
+    "module_quiz_avg", "final_score", "final_attempts", "updated_at"
+]
+
+def _rebuild(db, user_id=None, course_id=None):
+    stale = delete(Progress)
+    if course_id is not None:
+        stale = stale.where(Progress.course_id == course_id)
+    if user_id is not None:
+        stale = stale.where(Progress.user_id == user_id)
+    db.execute(stale)
+    db.execute(insert(Progress).from_select(_COLUMNS, _progress_select(user_id, course_id)))
+
+def module_stats(db, user_id, course_id):
+    """(completed_modules, module_quiz_avg) computed live, for learners without an enrolment row."""
+    QR = models.QuizResult
+    return tuple(db.execute(
+        select(
+            func.count(func.distinct(QR.module_id)),
+            func.avg(case((QR.total_questions > 0, QR.score * 100.0 / QR.total_questions)))
+        ).join(models.Module, models.Module.id == QR.module_id)
+        .where(QR.user_id == user_id, models.Module.course_id == course_id)
+    ).one())
+
+def refresh(db, user_id, course_id):
+    """Recompute one learner's progress in a course (no-op if not enrolled). Caller commits."""
+    _rebuild(db, user_id=user_id, course_id=course_id)
+
+def refresh_course(db, course_id):
+    """Recompute progress for every enrolment in a course. Caller commits."""
+    _rebuild(db, course_id=course_id)
+
+def rebuild_all(db):
+    """Recompute every row. Caller commits."""
+    _rebuild(db)
+
+def backfill(engine):
+    """Create rows for enrolments that have none yet, e.g. ones made before this table existed."""
+    with engine.begin() as conn:
+        conn.execute(insert(Progress).from_select(_COLUMNS, _progress_select(missing_only=True)))
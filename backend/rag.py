@@ -1,10 +1,32 @@
 import os
 import math
+import heapq
 import logging
+import re
 import json
+import bisect
+import hashlib
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from array import array
 from datetime import datetime
+from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
 from groq import Groq
+import rag_index
+from cache import TTLCache
+
+try:
+    import numpy as np
+except ImportError:  # Optional: enables the vectorized retrieval backend
+    np = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # Optional: lets linked PDF documents be indexed
+    PdfReader = None
 
 load_dotenv(override=True)
 logger = logging.getLogger(__name__)
@@ -19,44 +41,124 @@ if GROQ_API_KEY:
 else:
     print("WARNING: GROQ_API_KEY NOT FOUND in environment!")
 
+# Optional override of the Groq API endpoint, e.g. a local OpenAI-compatible server in tests
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+
 # Initialize Groq Client
 client = None
 if GROQ_API_KEY:
-    client = Groq(api_key=GROQ_API_KEY)
+    client = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
+
+DEBUG_LOG_FILE = "rag_debug.log"
 
 def log_debug(msg):
-    with open("rag_debug.log", "a") as f:
+    with open(DEBUG_LOG_FILE, "a") as f:
         f.write(f"{datetime.now()}: {msg}\n")
 
-# In-memory vector store
+# In-memory vector store. Each chunk holds its text plus a sparse vector
+# encoded against VOCAB: parallel arrays of term ids / weights and a
+# precomputed norm, e.g. {"text", "course_id", "ids", "weights", "norm"}.
 VECTOR_STORE = None
-INDEX_FILE = "data/vector_store.json"
+VOCAB = None
+# Read-only, memory-mapped index used until something needs the store in memory
+MAPPED_INDEX = None
+INDEX_FILE = "data/vector_store.bin"
+# Older JSON store, still readable; convert it with convert_vector_store.py
+JSON_INDEX_FILE = "data/vector_store.json"
+# Append-only log of per-course changes made since INDEX_FILE was written.
+# It is replayed on load and folded into INDEX_FILE by compact_index(), which
+# also runs after every replay.
+JOURNAL_FILE = "data/vector_store.journal"
+JOURNAL_COMPACT_THRESHOLD = int(os.getenv("RAG_JOURNAL_COMPACT_THRESHOLD", "200"))
+_JOURNAL_LENGTH = 0
+# CHUNK_VERSION of the chunks in the loaded store (0 for stores that predate it)
+INDEX_CHUNK_VERSION = 0
+
+# Guards the store against course updates racing with retrieval
+_INDEX_LOCK = threading.RLock()
+
+# Retrieval backend: "auto"/"numpy" score with NumPy when it is installed,
+# "python" forces the inverted-index loop.
+RAG_BACKEND = os.getenv("RAG_BACKEND", "auto").lower()
 
 def save_index():
     """Persist the VECTOR_STORE to disk."""
-    global VECTOR_STORE
+    global MAPPED_INDEX, _JOURNAL_LENGTH
     if VECTOR_STORE is None:
         return
     
     os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
     try:
-        with open(INDEX_FILE, "w") as f:
-            json.dump(VECTOR_STORE, f)
+        # Windows cannot replace a file that is still mapped
+        if MAPPED_INDEX is not None:
+            MAPPED_INDEX.close()
+            MAPPED_INDEX = None
+        terms = [None] * len(VOCAB)
+        for term, term_id in VOCAB.items():
+            terms[term_id] = term
+        rag_index.write_index(
+            INDEX_FILE, terms, [chunk for chunk in VECTOR_STORE if chunk is not None], chunk_version=INDEX_CHUNK_VERSION
+        )
+        # Everything in the journal is now part of INDEX_FILE
+        if os.path.exists(JOURNAL_FILE):
+            os.remove(JOURNAL_FILE)
+        _JOURNAL_LENGTH = 0
         log_debug(f"Index persisted to {INDEX_FILE}")
     except Exception as e:
         log_debug(f"Failed to save index: {e}")
 
 def load_index():
-    """Load the VECTOR_STORE from disk if it exists."""
-    global VECTOR_STORE
+    """Map the binary index from disk, falling back to the JSON store."""
+    global VECTOR_STORE, MAPPED_INDEX, INDEX_CHUNK_VERSION
     if os.path.exists(INDEX_FILE):
         try:
-            with open(INDEX_FILE, "r") as f:
-                VECTOR_STORE = json.load(f)
-            log_debug(f"Index loaded from {INDEX_FILE} ({len(VECTOR_STORE)} chunks)")
+            mapped = rag_index.MappedIndex(INDEX_FILE)
+            if MAPPED_INDEX is not None:
+                MAPPED_INDEX.close()
+            MAPPED_INDEX = mapped
+            VECTOR_STORE = None
+            INDEX_CHUNK_VERSION = mapped.chunk_version
+            log_debug(f"Index mapped from {INDEX_FILE} ({len(MAPPED_INDEX)} chunks)")
+            _replay_journal()
             return True
         except Exception as e:
-            log_debug(f"Failed to load index: {e}")
+            log_debug(f"Failed to map index: {e}")
+    if os.path.exists(JSON_INDEX_FILE):
+        if load_json_index(JSON_INDEX_FILE):
+            _replay_journal()
+            return True
+    return False
+
+def load_json_index(path):
+    """Load a JSON vector store (current or legacy layout) into memory."""
+    global VECTOR_STORE, VOCAB, INDEX_CHUNK_VERSION
+    try:
+        with open(path, "r") as f:
+            payload = json.load(f)
+
+        if isinstance(payload, list):
+            # Legacy format: a list of {"text", "embedding": {word: count}}
+            vocab = {}
+            store = [_make_chunk(c["text"], None, c["embedding"], vocab) for c in payload]
+        else:
+            vocab = {term: term_id for term_id, term in enumerate(payload["vocab"])}
+            store = [
+                {
+                    "text": c["text"],
+                    "course_id": c.get("course_id"),
+                    "ids": array("I", c["ids"]),
+                    "weights": array("I", c["weights"]),
+                    "norm": c["norm"]
+                } for c in payload["chunks"]
+            ]
+        VOCAB = vocab
+        VECTOR_STORE = store
+        INDEX_CHUNK_VERSION = payload.get("chunk_version", 0) if isinstance(payload, dict) else 0
+        build_inverted_index()
+        log_debug(f"Index loaded from {path} ({len(VECTOR_STORE)} chunks)")
+        return True
+    except Exception as e:
+        log_debug(f"Failed to load index: {e}")
     return False
 
 def get_embedding(text):
@@ -75,48 +177,506 @@ def cosine_similarity(v1, v2):
         return 0
     return dot / (mag1 * mag2)
 
+def _make_chunk(text, course_id, embedding, vocab):
+    """Encode a word->count embedding as a compact sparse vector over vocab."""
+    pairs = sorted((vocab.setdefault(term, len(vocab)), count) for term, count in embedding.items())
+    return {
+        "text": text,
+        "course_id": course_id,
+        "ids": array("I", (term_id for term_id, _ in pairs)),
+        "weights": array("I", (count for _, count in pairs)),
+        "norm": math.sqrt(sum(v*v for v in embedding.values()))
+    }
+
+# Inverted index over VECTOR_STORE: term id -> (chunk idx array, count array).
+# Removed chunks stay in VECTOR_STORE as None until the next compaction.
+INVERTED_INDEX = None
+CHUNK_NORMS = None
+COURSE_SLOTS = None  # course id -> chunk indices
+_INDEXED_STORE = None
+# Bumped on every change so lazily built structures know to refresh
+_STORE_VERSION = 0
+
+def build_inverted_index():
+    """Rebuild the term postings and the flat norm list from VECTOR_STORE."""
+    global INVERTED_INDEX, CHUNK_NORMS, COURSE_SLOTS, _INDEXED_STORE, _STORE_VERSION
+    index = [(array("I"), array("I")) for _ in range(len(VOCAB or ()))]
+    CHUNK_NORMS = [chunk["norm"] if chunk else 0.0 for chunk in VECTOR_STORE or []]
+    COURSE_SLOTS = {}
+    for idx, chunk in enumerate(VECTOR_STORE or []):
+        if chunk is None:
+            continue
+        for term_id, weight in zip(chunk["ids"], chunk["weights"]):
+            chunk_ids, weights = index[term_id]
+            chunk_ids.append(idx)
+            weights.append(weight)
+        if chunk["course_id"] is not None:
+            COURSE_SLOTS.setdefault(chunk["course_id"], []).append(idx)
+    INVERTED_INDEX = index
+    _INDEXED_STORE = VECTOR_STORE
+    _STORE_VERSION += 1
+
+# --- Chunking ---
+# Every chunk starts with a short header naming its course (and module) and
+# carries at most MAX_CHUNK_WORDS words of body text, so retrieval returns
+# tight context instead of whole documents.
+MAX_CHUNK_WORDS = int(os.getenv("RAG_MAX_CHUNK_WORDS", "120"))
+CHUNK_OVERLAP_WORDS = 20
+DOCUMENTS_DIR = "uploads/documents"
+DOCUMENT_EXTENSIONS = {".txt", ".md", ".csv", ".json", ".html", ".htm"}
+MAX_DOCUMENT_CHARS = 200_000
+# Bump whenever course_chunks changes how a course is split up; stored indexes
+# chunked by another version are rebuilt at startup (see is_current)
+CHUNK_VERSION = 2
+
+def _split_words(text):
+    """Split text into overlapping windows of at most MAX_CHUNK_WORDS words."""
+    words = (text or "").split()
+    if not words:
+        return []
+    step = max(MAX_CHUNK_WORDS - CHUNK_OVERLAP_WORDS, 1)
+    last_start = max(len(words) - CHUNK_OVERLAP_WORDS, 1)
+    return [" ".join(words[i:i + MAX_CHUNK_WORDS]) for i in range(0, last_start, step)]
+
+def read_document(content_link):
+    """Text of a module's linked upload under DOCUMENTS_DIR, or "" if there is none we can read."""
+    if not content_link or "uploads/documents/" not in content_link.replace("\\", "/"):
+        return ""
+    # Only ever look inside DOCUMENTS_DIR, whatever the link says
+    name = os.path.basename(unquote(urlparse(content_link).path).replace("\\", "/"))
+    path = os.path.join(DOCUMENTS_DIR, name)
+    ext = os.path.splitext(name)[1].lower()
+    if not name or not os.path.isfile(path):
+        return ""
+
+    try:
+        if ext == ".pdf":
+            if PdfReader is None:
+                return ""
+            text = "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+            return text[:MAX_DOCUMENT_CHARS]
+        if ext in DOCUMENT_EXTENSIONS:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read(MAX_DOCUMENT_CHARS)
+            if ext in (".html", ".htm"):
+                text = re.sub(r"<[^>]+>", " ", text)
+            return text
+    except Exception as e:
+        log_debug(f"Failed to read document {path}: {e}")
+    return ""
+
+def _question_text(question):
+    text = question.get("questionText") or ""
+    options = [o for o in question.get("options") or [] if o]
+    if options:
+        text += " Options: " + "; ".join(options)
+    return text
+
+def course_chunks(course):
+    """
+    Texts indexed for one course: its description, each module title, the
+    module's linked document and quiz questions, and the final assessment
+    questions (never the answers).
+    """
+    title = course["title"]
+    chunks = [f"Course: {title} Description: {part}" for part in _split_words(course.get("description"))]
+    if not chunks:
+        chunks.append(f"Course: {title}")
+
+    for module in course.get("modules") or []:
+        header = f"Course: {title} Module: {module['title']}"
+        chunks.append(header)
+        for part in _split_words(read_document(module.get("contentLink"))):
+            chunks.append(f"{header} Document: {part}")
+        for question in module.get("questions") or []:
+            for part in _split_words(_question_text(question)):
+                chunks.append(f"{header} Question: {part}")
+
+    for question in course.get("assessment") or []:
+        for part in _split_words(_question_text(question)):
+            chunks.append(f"Course: {title} Assessment Question: {part}")
+    return chunks
+
 def index_content(courses_data):
     """Build and save the index."""
+    global VECTOR_STORE, VOCAB, INDEX_CHUNK_VERSION
+    with _INDEX_LOCK:
+        vocab = {}
+        new_store = []
+        for course in courses_data:
+            for text in course_chunks(course):
+                new_store.append(_make_chunk(text, course.get("id"), get_embedding(text), vocab))
+        VOCAB = vocab
+        VECTOR_STORE = new_store
+        INDEX_CHUNK_VERSION = CHUNK_VERSION
+        build_inverted_index()
+        save_index()
+
+# --- Incremental updates ---
+
+def _materialize():
+    """Make sure the store is in memory and mutable, starting empty if there is no index."""
+    global VECTOR_STORE, VOCAB, MAPPED_INDEX, INDEX_CHUNK_VERSION
+    if VECTOR_STORE is None and MAPPED_INDEX is None:
+        load_index()
+    if VECTOR_STORE is None:
+        if MAPPED_INDEX is not None:
+            VOCAB, VECTOR_STORE = MAPPED_INDEX.to_store()
+            MAPPED_INDEX.close()
+            MAPPED_INDEX = None
+        else:
+            VOCAB, VECTOR_STORE = {}, []
+            INDEX_CHUNK_VERSION = CHUNK_VERSION
+    if VECTOR_STORE is not _INDEXED_STORE:
+        build_inverted_index()
+
+def _apply_remove(course_id):
+    global _STORE_VERSION
+    for idx in COURSE_SLOTS.pop(course_id, []):
+        chunk = VECTOR_STORE[idx]
+        for term_id in chunk["ids"]:
+            chunk_ids, weights = INVERTED_INDEX[term_id]
+            pos = bisect.bisect_left(chunk_ids, idx)
+            del chunk_ids[pos]
+            del weights[pos]
+        VECTOR_STORE[idx] = None
+        CHUNK_NORMS[idx] = 0.0
+    _STORE_VERSION += 1
+
+def _apply_add(course_id, texts):
+    global _STORE_VERSION
+    for text in texts:
+        idx = len(VECTOR_STORE)
+        chunk = _make_chunk(text, course_id, get_embedding(text), VOCAB)
+        while len(INVERTED_INDEX) < len(VOCAB):
+            INVERTED_INDEX.append((array("I"), array("I")))
+        # New chunks get the highest index, so postings stay sorted
+        for term_id, weight in zip(chunk["ids"], chunk["weights"]):
+            chunk_ids, weights = INVERTED_INDEX[term_id]
+            chunk_ids.append(idx)
+            weights.append(weight)
+        VECTOR_STORE.append(chunk)
+        CHUNK_NORMS.append(chunk["norm"])
+        COURSE_SLOTS.setdefault(course_id, []).append(idx)
+    _STORE_VERSION += 1
+
+def _append_journal(entry):
+    global _JOURNAL_LENGTH
+    os.makedirs(os.path.dirname(JOURNAL_FILE), exist_ok=True)
+    with open(JOURNAL_FILE, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    _JOURNAL_LENGTH += 1
+    if _JOURNAL_LENGTH >= JOURNAL_COMPACT_THRESHOLD:
+        compact_index()
+
+def _replay_journal():
+    """Apply changes logged since INDEX_FILE was written."""
+    global _JOURNAL_LENGTH
+    if not os.path.exists(JOURNAL_FILE) or os.path.getsize(JOURNAL_FILE) == 0:
+        _JOURNAL_LENGTH = 0
+        return
+    _materialize()
+    count = 0
+    with open(JOURNAL_FILE, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write
+                continue
+            _apply_remove(entry["course_id"])
+            if entry["op"] == "upsert":
+                _apply_add(entry["course_id"], entry["chunks"])
+            count += 1
+    _JOURNAL_LENGTH = count
+    log_debug(f"Replayed {count} journal entries from {JOURNAL_FILE}")
+    # Replaying deserialized the mapped index; fold the journal in now so the
+    # next process can map INDEX_FILE cold instead of paying that again
+    compact_index()
+
+def upsert_course(course):
+    """Add or replace one course's chunks without rebuilding the index."""
+    texts = course_chunks(course)
+    with _INDEX_LOCK:
+        _materialize()
+        _apply_remove(course["id"])
+        _apply_add(course["id"], texts)
+        _append_journal({"op": "upsert", "course_id": course["id"], "chunks": texts})
+    log_debug(f"Indexed course {course['id']} ({len(texts)} chunks)")
+
+def remove_course(course_id):
+    """Drop one course's chunks from the index."""
+    with _INDEX_LOCK:
+        if not is_indexed():
+            return
+        _materialize()
+        if course_id not in COURSE_SLOTS:
+            return
+        _apply_remove(course_id)
+        _append_journal({"op": "remove", "course_id": course_id})
+    log_debug(f"Removed course {course_id} from index")
+
+def compact_index():
+    """Rewrite INDEX_FILE from the in-memory store and drop the journal."""
     global VECTOR_STORE
-    new_store = []
-    for course in courses_data:
-        text = f"Course: {course['title']} Description: {course['description']}"
-        new_store.append({
-            "text": text,
-            "embedding": get_embedding(text)
-        })
-    VECTOR_STORE = new_store
-    save_index()
+    with _INDEX_LOCK:
+        if VECTOR_STORE is None:
+            return
+        VECTOR_STORE = [chunk for chunk in VECTOR_STORE if chunk is not None]
+        build_inverted_index()
+        save_index()
 
 def is_indexed():
     """Check if the index exists on disk or in memory."""
-    if VECTOR_STORE is not None:
+    if VECTOR_STORE is not None or MAPPED_INDEX is not None:
         return True
-    return os.path.exists(INDEX_FILE)
+    return os.path.exists(INDEX_FILE) or os.path.exists(JSON_INDEX_FILE)
 
-def retrieve(query, top_k=3):
-    """Retrieve context chunks, loading index from disk if necessary."""
-    global VECTOR_STORE
-    if VECTOR_STORE is None:
+def is_current():
+    """
+    Whether the stored index matches this version and can be updated per
+    course. Stores from before incremental updates have chunks without a
+    course id, which upsert_course and remove_course can never drop, and
+    stores chunked by another CHUNK_VERSION are laid out differently; both
+    need a full index_content rebuild.
+    """
+    with _INDEX_LOCK:
+        if not _ensure_loaded() or INDEX_CHUNK_VERSION != CHUNK_VERSION:
+            return False
+        if VECTOR_STORE is None:
+            return rag_index.NO_COURSE not in MAPPED_INDEX.course_ids
+        return all(chunk["course_id"] is not None for chunk in VECTOR_STORE if chunk is not None)
+
+def _ensure_loaded():
+    """Load the index from disk if needed and make sure derived structures are current."""
+    if VECTOR_STORE is None and MAPPED_INDEX is None:
         if not load_index():
             log_debug("Retrieve called but no index found.")
-            return []
+            return False
+    if VECTOR_STORE is not None and VECTOR_STORE is not _INDEXED_STORE:
+        build_inverted_index()
+    return True
 
+def use_numpy_backend():
+    """NumPy scoring unless disabled; without NumPy we always fall back to Python."""
+    return np is not None and RAG_BACKEND != "python"
+
+def _memory_postings(term):
+    term_id = VOCAB.get(term)
+    return None if term_id is None else INVERTED_INDEX[term_id]
+
+def _rank_chunks(query, postings_for, norms, n_chunks, top_k, is_live=None):
+    """Indices of the top_k chunks for query, scored through an inverted index."""
     query_emb = get_embedding(query)
-    scored = []
-    for chunk in VECTOR_STORE:
-        score = cosine_similarity(query_emb, chunk["embedding"])
-        scored.append((score, chunk["text"]))
-    scored.sort(reverse=True, key=lambda x: x[0])
-    return [text for _, text in scored[:top_k]]
+    query_norm = math.sqrt(sum(v*v for v in query_emb.values()))
 
-def generate_response(query, context_chunks):
-    if not client:
-        return "AI Error: Groq client not initialized. Check API Key."
+    # Accumulate dot products only for chunks sharing at least one term
+    dots = {}
+    if query_norm:
+        for term, q_weight in query_emb.items():
+            postings = postings_for(term)
+            if postings is None:
+                continue
+            for idx, weight in zip(*postings):
+                dots[idx] = dots.get(idx, 0) + q_weight * weight
 
-    try:
-        context = "\n".join(context_chunks)
-        prompt = f"""
+    # Ties keep store order, matching the stable sort this replaced
+    top = heapq.nlargest(
+        top_k,
+        ((dot / (query_norm * norms[idx]), -idx) for idx, dot in dots.items())
+    )
+    ranked = [-neg_idx for _, neg_idx in top]
+
+    # Fill the remainder with zero-score chunks, as the full scan did
+    idx = 0
+    while len(ranked) < top_k and idx < n_chunks:
+        if idx not in dots and (is_live is None or is_live(idx)):
+            ranked.append(idx)
+        idx += 1
+    return ranked
+
+def _rank_mapped_numpy(query, top_k):
+    """NumPy scoring straight off the mapped postings arrays."""
+    query_emb = get_embedding(query)
+    query_norm = math.sqrt(sum(v*v for v in query_emb.values()))
+    chunk_ids = []
+    weights = []
+    for term, q_weight in query_emb.items():
+        postings = MAPPED_INDEX.postings(term)
+        if postings is not None:
+            chunk_ids.append(np.frombuffer(postings[0], dtype=np.uint32))
+            weights.append(np.frombuffer(postings[1], dtype=np.uint32) * float(q_weight))
+
+    n_chunks = len(MAPPED_INDEX)
+    if chunk_ids:
+        dots = np.bincount(np.concatenate(chunk_ids), weights=np.concatenate(weights), minlength=n_chunks)
+    else:
+        dots = np.zeros(n_chunks, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = dots / (query_norm * np.frombuffer(MAPPED_INDEX.norms, dtype=np.float64))
+    scores[dots == 0] = 0
+    return _top_k_rows(scores, top_k)
+
+def retrieve(query, top_k=3):
+    """Retrieve context chunks, loading index from disk if necessary."""
+    with _INDEX_LOCK:
+        return _retrieve(query, top_k)
+
+def _retrieve(query, top_k):
+    if not _ensure_loaded():
+        return []
+
+    if VECTOR_STORE is None:
+        if use_numpy_backend():
+            ranked = _rank_mapped_numpy(query, top_k)
+        else:
+            ranked = _rank_chunks(query, MAPPED_INDEX.postings, MAPPED_INDEX.norms, len(MAPPED_INDEX), top_k)
+        return [MAPPED_INDEX.text(idx) for idx in ranked]
+
+    if use_numpy_backend():
+        return _retrieve_batch_numpy([query], top_k)[0]
+    ranked = _rank_chunks(
+        query, _memory_postings, CHUNK_NORMS, len(VECTOR_STORE), top_k,
+        is_live=lambda idx: VECTOR_STORE[idx] is not None
+    )
+    return [VECTOR_STORE[idx]["text"] for idx in ranked]
+
+def retrieve_batch(queries, top_k=3):
+    """Retrieve context chunks for several queries at once (one list per query)."""
+    with _INDEX_LOCK:
+        if not _ensure_loaded():
+            return [[] for _ in queries]
+        if VECTOR_STORE is not None and use_numpy_backend():
+            return _retrieve_batch_numpy(list(queries), top_k)
+        return [_retrieve(q, top_k) for q in queries]
+
+# --- Vectorized backend ---
+# All chunk vectors as one CSR matrix (rows = chunks, columns = vocab ids).
+CSR_MATRIX = None
+_CSR_VERSION = None
+
+def build_csr_matrix():
+    """Pack VECTOR_STORE into CSR arrays: indptr, indices, counts, row ids, norms and live rows."""
+    global CSR_MATRIX, _CSR_VERSION
+    live_chunks = [chunk for chunk in VECTOR_STORE if chunk is not None]
+    lengths = np.fromiter((len(chunk["ids"]) if chunk else 0 for chunk in VECTOR_STORE), dtype=np.int64, count=len(VECTOR_STORE))
+    indptr = np.zeros(len(VECTOR_STORE) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if live_chunks:
+        indices = np.concatenate([np.frombuffer(chunk["ids"], dtype=np.uint32) for chunk in live_chunks]).astype(np.int64)
+        counts = np.concatenate([np.frombuffer(chunk["weights"], dtype=np.uint32) for chunk in live_chunks]).astype(np.float64)
+    else:
+        indices = np.zeros(0, dtype=np.int64)
+        counts = np.zeros(0, dtype=np.float64)
+    CSR_MATRIX = {
+        "indptr": indptr,
+        "indices": indices,
+        "counts": counts,
+        "rows": np.repeat(np.arange(len(VECTOR_STORE), dtype=np.int64), lengths),
+        "norms": np.array(CHUNK_NORMS, dtype=np.float64),
+        "live": np.fromiter((chunk is not None for chunk in VECTOR_STORE), dtype=bool, count=len(VECTOR_STORE)),
+        "n_live": len(live_chunks)
+    }
+    _CSR_VERSION = _STORE_VERSION
+
+def _retrieve_batch_numpy(queries, top_k):
+    if CSR_MATRIX is None or _CSR_VERSION != _STORE_VERSION:
+        build_csr_matrix()
+    n_chunks = len(VECTOR_STORE)
+    if not queries or n_chunks == 0:
+        return [[] for _ in queries]
+
+    # Query matrix restricted to the vocabulary columns the batch actually uses
+    columns = {}
+    entries = []
+    query_norms = np.zeros(len(queries), dtype=np.float64)
+    for q_idx, query in enumerate(queries):
+        query_emb = get_embedding(query)
+        query_norms[q_idx] = math.sqrt(sum(v*v for v in query_emb.values()))
+        for term, q_weight in query_emb.items():
+            term_id = VOCAB.get(term)
+            if term_id is not None:
+                entries.append((q_idx, columns.setdefault(term_id, len(columns)), q_weight))
+
+    dots = np.zeros((len(queries), n_chunks), dtype=np.float64)
+    if entries:
+        q_matrix = np.zeros((len(queries), len(columns)), dtype=np.float64)
+        for q_idx, col, q_weight in entries:
+            q_matrix[q_idx, col] = q_weight
+        col_map = np.full(len(VOCAB), -1, dtype=np.int64)
+        col_map[np.fromiter(columns.keys(), dtype=np.int64)] = np.arange(len(columns))
+
+        # Sparse (chunks x vocab) times (vocab x queries), touching only the
+        # non-zeros whose column appears in some query
+        cols = col_map[CSR_MATRIX["indices"]]
+        hit = cols >= 0
+        rows = CSR_MATRIX["rows"][hit]
+        products = q_matrix[:, cols[hit]] * CSR_MATRIX["counts"][hit]
+        flat_rows = (rows + np.arange(len(queries))[:, None] * n_chunks).ravel()
+        dots = np.bincount(flat_rows, weights=products.ravel(), minlength=len(queries) * n_chunks)
+        dots = dots.reshape(len(queries), n_chunks)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = dots / (query_norms[:, None] * CSR_MATRIX["norms"][None, :])
+    scores[dots == 0] = 0
+    # Removed chunks must not even fill in as zero-score results
+    scores[:, ~CSR_MATRIX["live"]] = -np.inf
+    top_k = min(top_k, CSR_MATRIX["n_live"])
+
+    return [
+        [VECTOR_STORE[idx]["text"] for idx in _top_k_rows(row_scores, top_k)]
+        for row_scores in scores
+    ]
+
+def _top_k_rows(scores, top_k):
+    """Indices of the top_k scores, highest first, ties in store order."""
+    n = scores.shape[0]
+    k = min(top_k, n)
+    if k <= 0:
+        return []
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]].tolist()
+
+# --- LLM calls ---
+# The Groq client is synchronous and a completion can take many seconds.
+# LLM_MAX_CONCURRENCY caps completions in flight across every caller, and async
+# endpoints hand generation functions to run_llm() so the event loop keeps
+# serving other requests meanwhile.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+_LLM_SLOTS = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+def _complete(**kwargs):
+    """client.chat.completions.create, waiting for a free LLM slot first."""
+    with _LLM_SLOTS:
+        return client.chat.completions.create(**kwargs)
+
+async def run_llm(fn, *args, **kwargs):
+    """Await a blocking generation function (e.g. generate_response) on the LLM thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_LLM_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+# Chat answers, keyed on the normalized question plus a content hash of each
+# retrieved chunk. Editing or removing a course changes its chunks, so answers
+# built on the old text are never served again and simply age out.
+ANSWER_CACHE = TTLCache(
+    maxsize=int(os.getenv("ANSWER_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+)
+
+def answer_cache_key(query, context_chunks):
+    words = " ".join(re.findall(r"[\w']+", (query or "").lower()))
+    chunk_ids = tuple(hashlib.sha1(text.encode("utf-8")).hexdigest() for text in context_chunks)
+    return words, chunk_ids
+
+def _chat_prompt(query, context_chunks):
+    context = "\n".join(context_chunks)
+    return f"""
 You are an AI learning assistant helping a college student.
 
 Context:
@@ -127,9 +687,21 @@ Student Question:
 
 Explain clearly and simply.
 """
+
+def generate_response(query, context_chunks):
+    if not client:
+        return "AI Error: Groq client not initialized. Check API Key."
+
+    key = answer_cache_key(query, context_chunks)
+    cached = ANSWER_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        prompt = _chat_prompt(query, context_chunks)
         log_debug(f"Requesting Groq with model: llama-3.1-8b-instant")
         
-        result = client.chat.completions.create(
+        result = _complete(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "user", "content": prompt}
@@ -142,6 +714,8 @@ Explain clearly and simply.
 
         if result and result.choices:
             content = result.choices[0].message.content
+            if content:
+                ANSWER_CACHE.set(key, content)
             return content
         
         return "AI Error: No response generated by AI."
@@ -151,6 +725,51 @@ Explain clearly and simply.
         log_debug(f"AI ERROR: {str(e)}")
         raise e
 
+def stream_response(query, context_chunks):
+    """
+    Same answer as generate_response, yielded piece by piece as Groq produces it.
+    Errors are raised to the caller, which has usually started sending already.
+    """
+    if not client:
+        yield "AI Error: Groq client not initialized. Check API Key."
+        return
+
+    key = answer_cache_key(query, context_chunks)
+    cached = ANSWER_CACHE.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    try:
+        prompt = _chat_prompt(query, context_chunks)
+        log_debug(f"Requesting Groq stream with model: llama-3.1-8b-instant")
+        parts = []
+
+        # The slot is held until the stream is exhausted or closed
+        with _LLM_SLOTS:
+            stream = client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.4,
+                timeout=120,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+
+        log_debug(f"Groq stream finished")
+        if parts:
+            ANSWER_CACHE.set(key, "".join(parts))
+
+    except Exception as e:
+        print("AI ERROR:", str(e))
+        log_debug(f"AI ERROR: {str(e)}")
+        raise e
+
 def generate_questions(topic, question_type, count=10, difficulty="mixed"):
     if not client:
         return []
@@ -192,7 +811,7 @@ Each object MUST include a "difficulty" field ("easy", "medium", or "hard") and
 """
         log_debug(f"Generating {count} {question_type} questions for topic: {topic}")
 
-        result = client.chat.completions.create(
+        result = _complete(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": "You are a helpful educational assistant that generates structured quiz questions in JSON format."},
@@ -262,7 +881,7 @@ Return a JSON object following this structure exactly:
 """
         log_debug(f"Generating single {difficulty} {question_type} question for topic: {topic}")
 
-        result = client.chat.completions.create(
+        result = _complete(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": "You are a professional educational assessment designer."},
@@ -284,10 +903,33 @@ Return a JSON object following this structure exactly:
         log_debug(f"Adaptive Generation Error: {str(e)}")
         return None
 
+# Reconstructions of recent speech fragments, keyed on normalize_speech(text)
+SPEECH_CACHE = TTLCache(
+    maxsize=int(os.getenv("SPEECH_CACHE_SIZE", "2048")),
+    ttl=int(os.getenv("SPEECH_CACHE_TTL", "3600"))
+)
+
+def normalize_speech(text):
+    """
+    Cache key for a speech fragment: lowercased words without punctuation,
+    with stuttered prefixes ("wh-what") and repeated words ("the... the") folded.
+    """
+    text = re.sub(r"\b(\w+)-(?=\1)", "", (text or "").lower())
+    words = []
+    for word in re.findall(r"[\w']+", text):
+        if not words or words[-1] != word:
+            words.append(word)
+    return " ".join(words)
+
 def clean_speech(text):
     if not client:
         return text
 
+    key = normalize_speech(text)
+    cached = SPEECH_CACHE.get(key) if key else None
+    if cached is not None:
+        return cached
+
     try:
         # 1. Use the EXACT strict prompt requested
         prompt = f"""You are an accessibility speech reconstruction engine.
@@ -310,7 +952,7 @@ Corrected sentence:"""
 
         log_debug(f"Cleaning speech with strict prompt: {text[:50]}...")
         
-        result = client.chat.completions.create(
+        result = _complete(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "user", "content": prompt}
@@ -345,6 +987,8 @@ Corrected sentence:"""
             cleaned = cleaned.strip('"').strip("'").strip()
 
             log_debug(f"Final cleaned result: {cleaned}")
+            if cleaned and key:
+                SPEECH_CACHE.set(key, cleaned)
             return cleaned if cleaned else text
         
         return text
@@ -388,7 +1032,7 @@ Output the report in clear Markdown.
 """
         log_debug(f"Generating personalized feedback for {student_name} in {course_title}")
         
-        result = client.chat.completions.create(
+        result = _complete(
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": "You are a professional educational consultant."},
@@ -0,0 +1,211 @@
+"""
+Binary on-disk format for the RAG vector store.
+
+The file is laid out so it can be memory-mapped and queried in place:
+
+    header        magic, version, counts, the writer's chunking version and the byte offset of every section
+    vocab         sorted UTF-8 terms (offsets array + blob), so lookups are a binary search
+    postings      per-term offsets into parallel chunk-id / count arrays
+    chunks        per-chunk norm, course id and text (offsets array + blob)
+
+All arrays are little-endian and 8-byte aligned. Term ids inside the file are
+positions in the sorted vocabulary.
+"""
+import os
+import sys
+import mmap
+import struct
+from array import array
+
+MAGIC = b"EDRAGIDX"
+FORMAT_VERSION = 1
+
+# magic, version, n_chunks, n_terms, chunk_version, then 9 section offsets
+_HEADER = struct.Struct("<8sIIII9Q")
+_SECTIONS = (
+    "vocab_offsets", "vocab_blob", "term_ptr", "post_chunks", "post_counts",
+    "norms", "course_ids", "text_offsets", "text_blob"
+)
+NO_COURSE = -1
+
+def _require_little_endian():
+    if sys.byteorder != "little":
+        raise ValueError("The binary RAG index is only supported on little-endian hosts")
+
+def write_index(path, terms, chunks, chunk_version=0):
+    """
+    Write chunks to path in the binary format.
+    terms: list where terms[i] is the word for in-memory vocab id i.
+    chunks: dicts with "text", "course_id", "ids", "weights" and "norm".
+    chunk_version: how the texts were chunked (rag.CHUNK_VERSION), 0 if unknown.
+    """
+    _require_little_endian()
+
+    # Sorted vocabulary and the in-memory id -> file id mapping
+    order = sorted(range(len(terms)), key=lambda t: terms[t].encode("utf-8"))
+    remap = array("I", [0]) * len(terms)
+    for file_id, mem_id in enumerate(order):
+        remap[mem_id] = file_id
+
+    vocab_offsets = array("Q", [0])
+    vocab_blob = bytearray()
+    for mem_id in order:
+        vocab_blob += terms[mem_id].encode("utf-8")
+        vocab_offsets.append(len(vocab_blob))
+
+    # Postings in term order, chunk ids ascending within each term
+    term_ptr = array("Q", [0]) * (len(terms) + 1)
+    for chunk in chunks:
+        for mem_id in chunk["ids"]:
+            term_ptr[remap[mem_id] + 1] += 1
+    for t in range(len(terms)):
+        term_ptr[t + 1] += term_ptr[t]
+    nnz = term_ptr[-1]
+    post_chunks = array("I", [0]) * nnz
+    post_counts = array("I", [0]) * nnz
+    cursor = term_ptr[:-1]
+    for idx, chunk in enumerate(chunks):
+        for mem_id, count in zip(chunk["ids"], chunk["weights"]):
+            file_id = remap[mem_id]
+            pos = cursor[file_id]
+            post_chunks[pos] = idx
+            post_counts[pos] = count
+            cursor[file_id] = pos + 1
+
+    norms = array("d", (chunk["norm"] for chunk in chunks))
+    course_ids = array("q", (NO_COURSE if chunk["course_id"] is None else chunk["course_id"] for chunk in chunks))
+    text_offsets = array("Q", [0])
+    text_blob = bytearray()
+    for chunk in chunks:
+        text_blob += chunk["text"].encode("utf-8")
+        text_offsets.append(len(text_blob))
+
+    sections = [
+        vocab_offsets.tobytes(), bytes(vocab_blob), term_ptr.tobytes(), post_chunks.tobytes(),
+        post_counts.tobytes(), norms.tobytes(), course_ids.tobytes(), text_offsets.tobytes(), bytes(text_blob)
+    ]
+
+    offsets = []
+    position = _HEADER.size
+    for data in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(data)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(chunks), len(terms), chunk_version, *offsets))
+        for offset, data in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, path)
+
+class MappedIndex:
+    """Read-only view over a binary index file, backed by mmap."""
+
+    def __init__(self, path):
+        _require_little_endian()
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a RAG index file")
+
+        self._views = []
+        magic, version, n_chunks, n_terms, chunk_version, *offsets = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} RAG index file")
+        self.n_chunks = n_chunks
+        self.n_terms = n_terms
+        # Files written before this field was used have 0 here
+        self.chunk_version = chunk_version
+        self._offsets = dict(zip(_SECTIONS, offsets))
+
+        self.vocab_offsets = self._array("vocab_offsets", "Q", n_terms + 1)
+        self.term_ptr = self._array("term_ptr", "Q", n_terms + 1)
+        nnz = self.term_ptr[n_terms]
+        self.post_chunks = self._array("post_chunks", "I", nnz)
+        self.post_counts = self._array("post_counts", "I", nnz)
+        self.norms = self._array("norms", "d", n_chunks)
+        self.course_ids = self._array("course_ids", "q", n_chunks)
+        self.text_offsets = self._array("text_offsets", "Q", n_chunks + 1)
+
+    def _array(self, section, typecode, length):
+        start = self._offsets[section]
+        size = struct.calcsize(typecode)
+        raw = memoryview(self._mm)[start:start + length * size]
+        view = raw.cast(typecode)
+        self._views.extend([view, raw])
+        return view
+
+    def __len__(self):
+        return self.n_chunks
+
+    def term_id(self, term):
+        """File term id for a word, or None if it is not in the vocabulary."""
+        key = term.encode("utf-8")
+        base = self._offsets["vocab_blob"]
+        offsets = self.vocab_offsets
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._mm[base + offsets[mid]:base + offsets[mid + 1]]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def term(self, term_id):
+        base = self._offsets["vocab_blob"]
+        return self._mm[base + self.vocab_offsets[term_id]:base + self.vocab_offsets[term_id + 1]].decode("utf-8")
+
+    def postings(self, term):
+        """(chunk ids, counts) views for a word, or None if it is unknown."""
+        term_id = self.term_id(term)
+        if term_id is None:
+            return None
+        start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+        return self.post_chunks[start:end], self.post_counts[start:end]
+
+    def text(self, idx):
+        base = self._offsets["text_blob"]
+        return self._mm[base + self.text_offsets[idx]:base + self.text_offsets[idx + 1]].decode("utf-8")
+
+    def course_id(self, idx):
+        value = self.course_ids[idx]
+        return None if value == NO_COURSE else value
+
+    def to_store(self):
+        """Deserialize everything into (vocab dict, chunk dicts) for the in-memory store."""
+        chunk_ids = [array("I") for _ in range(self.n_chunks)]
+        chunk_counts = [array("I") for _ in range(self.n_chunks)]
+        for term_id in range(self.n_terms):
+            for pos in range(self.term_ptr[term_id], self.term_ptr[term_id + 1]):
+                idx = self.post_chunks[pos]
+                chunk_ids[idx].append(term_id)
+                chunk_counts[idx].append(self.post_counts[pos])
+        vocab = {self.term(term_id): term_id for term_id in range(self.n_terms)}
+        chunks = [
+            {
+                "text": self.text(idx),
+                "course_id": self.course_id(idx),
+                "ids": chunk_ids[idx],
+                "weights": chunk_counts[idx],
+                "norm": self.norms[idx]
+            } for idx in range(self.n_chunks)
+        ]
+        return vocab, chunks
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mm.close()
+        self._file.close()
@@ -217,6 +217,7 @@ class Notification(BaseModel):
     type: str
     is_read: bool
     created_at: datetime
+    source: str = "personal" # 'personal' or 'broadcast'; ids are unique per source
     model_config = {"from_attributes": True}
 
 
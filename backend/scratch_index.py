@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+import rag
+
+def use_scratch_index(tmp_dir=None):
+    """Point the RAG index, its journal and debug log at tmp_dir so the
+    verify/benchmark scripts never touch backend/data or rag_debug.log.
+    Returns the directory, creating a fresh temp dir if none is given."""
+    if tmp_dir is None:
+        tmp_dir = tempfile.mkdtemp()
+    rag.INDEX_FILE = os.path.join(tmp_dir, "vector_store.bin")
+    rag.JSON_INDEX_FILE = os.path.join(tmp_dir, "vector_store.json")
+    rag.JOURNAL_FILE = os.path.join(tmp_dir, "vector_store.journal")
+    rag.DEBUG_LOG_FILE = os.path.join(tmp_dir, "rag_debug.log")
+    return tmp_dir
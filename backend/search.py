@@ -0,0 +1,90 @@
+"""
+Full-text course search backed by an SQLite FTS5 index.
+
+courses_fts is an external-content FTS5 table over courses.title and
+courses.description; triggers keep it in step with every insert, update and
+delete on courses, including ones made outside the ORM. On databases without
+FTS5 the search falls back to the old ilike substring match.
+"""
+import re
+from sqlalchemy import text, or_, Integer, Float
+import models
+
+FTS_TABLE = "courses_fts"
+# bm25 column weights: a hit in the title counts for more than one in the description
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+FTS_ENABLED = False
+
+_DDL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, content='courses', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON courses BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON courses BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON courses BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+def setup_course_search(engine):
+    """Create the FTS index and its triggers if missing; returns whether FTS search is enabled."""
+    global FTS_ENABLED
+    if engine.dialect.name != "sqlite":
+        FTS_ENABLED = False
+        return False
+
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+            if exists:
+                for ddl in _DDL[1:]:
+                    conn.execute(text(ddl))
+            else:
+                for ddl in _DDL:
+                    conn.execute(text(ddl))
+                # Index the courses that existed before the table did
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        FTS_ENABLED = True
+    except Exception as e:
+        # e.g. an SQLite build without FTS5
+        print(f"Course full-text search unavailable, using substring search: {e}")
+        FTS_ENABLED = False
+    return FTS_ENABLED
+
+def match_expression(q):
+    """FTS5 query for user input: every word must match, each as a prefix."""
+    words = re.findall(r"\w+", q or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+def apply_course_search(query, q, ranked=True):
+    """
+    Restrict a Course query to courses matching q. With ranked=True the
+    results are ordered best match first (title hits weigh more).
+    """
+    expression = match_expression(q)
+    if not FTS_ENABLED or not expression:
+        return query.filter(
+            or_(
+                models.Course.title.ilike(f"%{q}%"),
+                models.Course.description.ilike(f"%{q}%")
+            )
+        )
+
+    matches = text(
+        f"SELECT rowid AS course_id, bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    ).bindparams(match=expression).columns(course_id=Integer, rank=Float).subquery()
+    query = query.join(matches, matches.c.course_id == models.Course.id)
+    if ranked:
+        query = query.order_by(matches.c.rank, models.Course.id)
+    return query
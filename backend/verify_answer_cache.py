@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from groq import Groq
+
+import rag
+from scratch_index import use_scratch_index
+from fake_llm_server import FakeLLMServer
+
+def ask(query, stream=False):
+    chunks = rag.retrieve(query)
+    if stream:
+        return "".join(rag.stream_response(query, chunks))
+    return rag.generate_response(query, chunks)
+
+def test_answer_cache():
+    print("Testing the chat answer cache...")
+    use_scratch_index()
+    rag.index_content([
+        {"id": 1, "title": "Python Basics", "description": "Learn Python loops and functions", "modules": []},
+        {"id": 2, "title": "Java Basics", "description": "Learn Java classes", "modules": []}
+    ])
+
+    llm = FakeLLMServer(token_delay=0.1).start()
+    rag.client = Groq(api_key="test", base_url=llm.base_url)
+    rag.ANSWER_CACHE.clear()
+    try:
+        # 1. The same question about the same chunks is answered once
+        start = time.perf_counter()
+        first = ask("What are Python loops?")
+        miss_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        again = [ask("what are python loops"), ask("  What are PYTHON loops?? "), ask("What are Python loops?", stream=True)]
+        hit_ms = (time.perf_counter() - start) / len(again) * 1000
+        if llm.requests != 1 or any(answer != first for answer in again):
+            print(f"Error: {llm.requests} LLM calls for one question.")
+            return False
+        print(f"Success: miss {miss_ms:.0f} ms, hit {hit_ms:.2f} ms, stats {rag.ANSWER_CACHE.stats()}")
+
+        # 2. A different question or different context goes to the LLM
+        ask("What are Java classes?")
+        if llm.requests != 2:
+            print("Error: different question served from cache.")
+            return False
+
+        # 3. Changing the course behind the chunks invalidates the answer
+        rag.upsert_course({"id": 1, "title": "Python Basics", "description": "Learn Python loops, generators and functions", "modules": []})
+        ask("What are Python loops?")
+        if llm.requests != 3:
+            print("Error: stale answer served after the course changed.")
+            return False
+        print("Success: new questions and changed chunks miss the cache.")
+
+        # 4. Streamed answers fill the cache too
+        ask("Explain Java", stream=True)
+        ask("explain java")
+        if llm.requests != 4:
+            print("Error: streamed answer not cached.")
+            return False
+        print("Success: streamed answers are cached.")
+        return True
+    finally:
+        llm.stop()
+
+if __name__ == "__main__":
+    if test_answer_cache():
+        print("\nANSWER CACHE TEST PASSED!")
+    else:
+        print("\nANSWER CACHE TEST FAILED!")
+        sys.exit(1)
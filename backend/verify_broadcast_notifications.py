@@ -0,0 +1,145 @@
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'broadcasts.db')}"
+
+from sqlalchemy import event, insert
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+from scratch_index import use_scratch_index
+
+# Keep the RAG index, its journal and debug log out of backend/ as well
+use_scratch_index(tmp_dir)
+
+client = TestClient(main.app)
+
+def auth_headers(email):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': email})}"}
+
+def add_learners(start, n):
+    joined = datetime.utcnow() - timedelta(days=1)
+    with database.engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"name": f"Learner {i}", "email": f"bcast{i}@test.com", "password": "x", "role": "learner", "created_at": joined}
+            for i in range(start, start + n)
+        ])
+
+def publish(course_id, headers):
+    """Publish a course; returns the number of SQL statements the request ran."""
+    count = 0
+    def on_execute(*args):
+        nonlocal count
+        count += 1
+    client.put(f"/courses/{course_id}/status", json={"status": "Draft"}, headers=headers)
+    event.listen(database.engine, "before_cursor_execute", on_execute)
+    try:
+        resp = client.put(f"/courses/{course_id}/status", json={"status": "Published"}, headers=headers)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", on_execute)
+    if resp.status_code != 200:
+        raise RuntimeError(f"Publish returned {resp.status_code}: {resp.text}")
+    return count
+
+def notifications_for(email):
+    resp = client.get("/notifications", headers=auth_headers(email))
+    if resp.status_code != 200:
+        raise RuntimeError(f"GET /notifications returned {resp.status_code}: {resp.text}")
+    return resp.json()
+
+def test_broadcast_notifications():
+    print("Testing broadcast notifications...")
+    db = database.SessionLocal()
+    try:
+        instructor = models.User(name="Announcer", email="announcer@test.com", password="x", role="instructor")
+        course = models.Course(title="Broadcast Course", description="x", status="Draft", instructor=instructor)
+        db.add(course)
+        db.commit()
+        course_id = course.id
+    finally:
+        db.close()
+    headers = auth_headers("announcer@test.com")
+
+    # 1. A launch costs the same whatever the number of learners
+    add_learners(0, 100)
+    small = publish(course_id, headers)
+    add_learners(100, 9900)
+    large = publish(course_id, headers)
+    db = database.SessionLocal()
+    try:
+        personal_rows = db.query(models.Notification).count()
+        broadcast_rows = db.query(models.BroadcastNotification).count()
+        # A personal notification for one learner, newer than both launches
+        learner = db.query(models.User).filter(models.User.email == "bcast1@test.com").first()
+        db.add(models.Notification(user_id=learner.id, title="Badge Earned!", message="Earned 'Newbie'", type="success"))
+        db.commit()
+    finally:
+        db.close()
+    if small != large or personal_rows != 0 or broadcast_rows != 2:
+        print(f"Error: publish ran {small} vs {large} statements, wrote {personal_rows} personal rows.")
+        return False
+    print(f"Success: publishing to 100 or 10,000 learners runs {large} statements and writes one row.")
+
+    # 2. Personal and broadcast items are merged, newest first
+    items = notifications_for("bcast1@test.com")
+    if [(n["source"], n["title"]) for n in items] != [
+        ("personal", "Badge Earned!"), ("broadcast", "New Course Launched!"), ("broadcast", "New Course Launched!")
+    ] or any(n["is_read"] for n in items):
+        print(f"Error: unexpected merged list {items}")
+        return False
+    print("Success: personal and broadcast notifications merged.")
+
+    # 3. Read receipts are per user and idempotent
+    broadcast_id = items[1]["id"]
+    for _ in range(2):
+        if client.put(f"/notifications/broadcasts/{broadcast_id}/read", headers=auth_headers("bcast1@test.com")).status_code != 200:
+            print("Error: marking a broadcast read failed.")
+            return False
+    read = {n["id"]: n["is_read"] for n in notifications_for("bcast1@test.com") if n["source"] == "broadcast"}
+    other = {n["id"]: n["is_read"] for n in notifications_for("bcast2@test.com")}
+    db = database.SessionLocal()
+    try:
+        receipts = db.query(models.BroadcastRead).count()
+    finally:
+        db.close()
+    if read[broadcast_id] is not True or list(read.values()).count(True) != 1 or any(other.values()) or receipts != 1:
+        print(f"Error: read state wrong: {read} / {other} / {receipts} receipts")
+        return False
+    print("Success: one receipt, read state only for that learner.")
+
+    # 4. Instructors and learners who joined later do not see the launches
+    db = database.SessionLocal()
+    try:
+        db.add(models.User(name="Newcomer", email="newcomer@test.com", password="x", role="learner"))
+        db.commit()
+    finally:
+        db.close()
+    client.put(f"/notifications/broadcasts/{broadcast_id}/read", headers=auth_headers("newcomer@test.com"))
+    if notifications_for("announcer@test.com") or notifications_for("newcomer@test.com"):
+        print("Error: broadcast shown outside its audience.")
+        return False
+    db = database.SessionLocal()
+    try:
+        receipts = db.query(models.BroadcastRead).count()
+    finally:
+        db.close()
+    if receipts != 1:
+        print("Error: receipt recorded for a broadcast the user cannot see.")
+        return False
+    print("Success: broadcasts limited to learners registered before the launch.")
+    return True
+
+if __name__ == "__main__":
+    if test_broadcast_notifications():
+        print("\nBROADCAST NOTIFICATION TEST PASSED!")
+    else:
+        print("\nBROADCAST NOTIFICATION TEST FAILED!")
+        sys.exit(1)
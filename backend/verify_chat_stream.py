@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+import time
+import socket
+import tempfile
+import threading
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database unless the importing script chose one;
+# must be set before the app is imported
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'chat_stream.db')}")
+
+import httpx
+import uvicorn
+from groq import Groq
+
+import rag
+from scratch_index import use_scratch_index
+from fake_llm_server import FakeLLMServer
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_app():
+    """Run the real app with uvicorn in a background thread; the index goes to a temp dir."""
+    use_scratch_index()
+
+    import main
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=free_port(), log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{server.config.port}"
+
+def test_chat_stream():
+    print("Testing streamed /api/chat against a fake LLM...")
+    llm = FakeLLMServer(token_delay=0.3).start()
+    rag.client = Groq(api_key="test", base_url=llm.base_url)
+    server, base_url = start_app()
+    expected = "".join(llm.tokens)
+
+    try:
+        # 1. Buffered mode is unchanged
+        start = time.perf_counter()
+        resp = httpx.post(f"{base_url}/api/chat", json={"message": "What is recursion?"}, timeout=30)
+        buffered_s = time.perf_counter() - start
+        if resp.status_code != 200 or resp.json().get("response") != expected:
+            print(f"Error: buffered chat returned {resp.status_code} {resp.text}")
+            return False
+        print(f"Success: buffered answer after {buffered_s * 1000:.0f} ms.")
+
+        # 2. Streamed mode sends the first token long before the answer is complete
+        tokens, first_token_s, done = [], None, False
+        start = time.perf_counter()
+        with httpx.stream("POST", f"{base_url}/api/chat", json={"message": "Explain recursion with an example", "stream": True}, timeout=30) as resp:
+            if resp.headers.get("content-type", "").split(";")[0] != "text/event-stream":
+                print(f"Error: unexpected content type {resp.headers.get('content-type')}")
+                return False
+            event = "message"
+            for line in resp.iter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    if event == "done":
+                        done = True
+                    elif event == "message":
+                        if first_token_s is None:
+                            first_token_s = time.perf_counter() - start
+                        tokens.append(json.loads(line[len("data: "):])["token"])
+                elif not line:
+                    event = "message"
+        total_s = time.perf_counter() - start
+
+        if "".join(tokens) != expected or not done:
+            print(f"Error: streamed answer '{''.join(tokens)}' (done={done})")
+            return False
+        if first_token_s is None or first_token_s > total_s / 2:
+            print(f"Error: first token after {first_token_s} s of {total_s:.2f} s, not streamed.")
+            return False
+        print(f"Success: first token after {first_token_s * 1000:.0f} ms, full answer after {total_s * 1000:.0f} ms.")
+        return True
+    finally:
+        server.should_exit = True
+        llm.stop()
+
+if __name__ == "__main__":
+    if test_chat_stream():
+        print("\nCHAT STREAM TEST PASSED!")
+    else:
+        print("\nCHAT STREAM TEST FAILED!")
+        sys.exit(1)
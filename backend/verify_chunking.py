@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+import rag
+from scratch_index import use_scratch_index
+
+def test_chunking():
+    print("Testing module- and question-level chunking...")
+    tmp_dir = use_scratch_index()
+    rag.DOCUMENTS_DIR = os.path.join(tmp_dir, "documents")
+    os.makedirs(rag.DOCUMENTS_DIR)
+
+    filler = " ".join(f"filler{i}" for i in range(1000))
+    with open(os.path.join(rag.DOCUMENTS_DIR, "recursion.txt"), "w") as f:
+        f.write(f"{filler} A recursive function calls itself until it reaches a base case. {filler}")
+
+    course = {
+        "id": 1,
+        "title": "Algorithms",
+        "description": " ".join(["Sorting and searching explained."] * 100),
+        "modules": [{
+            "id": 10,
+            "title": "Recursion",
+            "contentLink": "http://localhost:8000/uploads/documents/recursion.txt",
+            "questions": [{"questionText": "What stops a recursive call?", "options": ["Base case", "Loop"]}]
+        }, {
+            "id": 11,
+            "title": "Graphs",
+            "contentLink": "/uploads/documents/../../../etc/passwd",
+            "questions": []
+        }],
+        "assessment": [{"questionText": "Explain binary search complexity", "options": []}]
+    }
+
+    # 1. Every chunk body is bounded
+    chunks = rag.course_chunks(course)
+    longest = max(len(text.split()) for text in chunks)
+    if longest > rag.MAX_CHUNK_WORDS + 10:
+        print(f"Error: chunk of {longest} words exceeds the bound.")
+        return False
+    if not any("Module: Graphs" in text for text in chunks) or any("root:" in text for text in chunks):
+        print("Error: module title missing or a document outside the uploads folder was read.")
+        return False
+    print(f"Success: {len(chunks)} chunks, longest {longest} words.")
+
+    # 2. Retrieval lands on the small chunk that answers the question
+    rag.index_content([course])
+    top = rag.retrieve("function calls itself", top_k=1)[0]
+    if "Document:" not in top or "base case" not in top:
+        print(f"Error: document chunk not retrieved, got '{top[:80]}...'")
+        return False
+    print("Success: document chunk retrieved.")
+
+    if "Assessment Question" not in rag.retrieve("binary search complexity", top_k=1)[0]:
+        print("Error: assessment question not retrieved.")
+        return False
+    if "Options: Base case; Loop" not in rag.retrieve("what stops a recursive call", top_k=1)[0]:
+        print("Error: module quiz question not retrieved.")
+        return False
+    print("Success: quiz and assessment questions retrieved.")
+
+    # 3. The index records how it was chunked; other versions are flagged for a rebuild
+    rag.VECTOR_STORE = rag.MAPPED_INDEX = None
+    if not rag.is_current() or rag.MAPPED_INDEX.chunk_version != rag.CHUNK_VERSION:
+        print("Error: freshly built index not marked with the current chunk version.")
+        return False
+    rag.INDEX_CHUNK_VERSION = rag.CHUNK_VERSION - 1
+    rag._materialize()
+    rag.compact_index()
+    rag.VECTOR_STORE = rag.MAPPED_INDEX = None
+    if rag.is_current():
+        print("Error: index chunked by an older version reported as current.")
+        return False
+    print("Success: index chunked by an older version flagged for a rebuild.")
+    return True
+
+if __name__ == "__main__":
+    if test_chunking():
+        print("\nCHUNKING TEST PASSED!")
+    else:
+        print("\nCHUNKING TEST FAILED!")
+        sys.exit(1)
@@ -0,0 +1,153 @@
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'course_detail.db')}"
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+from scratch_index import use_scratch_index
+
+# Keep the RAG index, its journal and debug log out of backend/ as well
+use_scratch_index(tmp_dir)
+
+client = TestClient(main.app)
+
+def auth_headers(email):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': email})}"}
+
+class QueryCounter:
+    def __enter__(self):
+        self.count = 0
+        event.listen(database.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(database.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def get_course(course_id, headers=None):
+    with QueryCounter() as counter:
+        resp = client.get(f"/courses/{course_id}", headers=headers)
+    return resp, counter.count
+
+def mcq(text, **kwargs):
+    return models.Question(questionText=text, questionType="mcq", correctOptionIndex=1, difficulty="easy",
+                           options=[models.QuestionOption(text=f"{text} option {o}") for o in range(4)], **kwargs)
+
+def seed_course(db, instructor, n_modules):
+    course = models.Course(title=f"Detail {n_modules}", description="Cached", status="Published", instructor=instructor)
+    course.modules = [models.Module(title=f"M{m}", contentLink=f"/m{m}.pdf", quiz=[mcq(f"M{m}Q{q}") for q in range(4)])
+                      for m in range(n_modules)]
+    course.assessment = [mcq(f"F{q}") for q in range(5)]
+    db.add(course)
+    db.commit()
+    return course.id
+
+def expected_payload(db, course_id, owner_view, learner_id=None):
+    """GET /courses/{id} as the uncached implementation built it."""
+    db.expire_all()
+    course = db.get(models.Course, course_id)
+    return {
+        "id": course.id, "_id": course.id, "title": course.title, "description": course.description,
+        "thumbnail": course.thumbnail, "price": course.price, "status": course.status,
+        "instructor_id": course.instructor_id,
+        "enrolledStudents": [e.user_id for e in course.enrolments if e.user],
+        "instructor": {"id": course.instructor.id, "name": course.instructor.name, "email": course.instructor.email},
+        "modules": [{"id": m.id, "title": m.title, "contentLink": m.contentLink,
+                     "quiz": [{"id": q.id, "questionText": q.questionText, "questionType": q.questionType,
+                               "options": [{"text": o.text} for o in q.options]} for q in m.quiz]}
+                    for m in course.modules],
+        "assessment": [{"id": q.id, "questionText": q.questionText, "questionType": q.questionType,
+                        "options": [{"text": o.text} for o in q.options],
+                        **({"correctOptionIndex": q.correctOptionIndex, "correctAnswerText": q.correctAnswerText,
+                            "difficulty": q.difficulty} if owner_view else {})}
+                       for q in course.assessment],
+        "isAssessmentCompleted": learner_id is not None and db.query(models.QuizResult).filter(
+            models.QuizResult.user_id == learner_id, models.QuizResult.course_id == course_id).first() is not None,
+        "hasCertificate": learner_id is not None and db.query(models.Certificate).filter(
+            models.Certificate.user_id == learner_id, models.Certificate.course_id == course_id).first() is not None
+    }
+
+def test_course_detail_cache():
+    print("Testing cached course detail payloads...")
+    db = database.SessionLocal()
+    try:
+        instructor = models.User(name="Detail Owner", email="detail-owner@test.com", password="x", role="instructor")
+        learner = models.User(name="Detail Learner", email="detail-learner@test.com", password="x", role="learner")
+        other = models.User(name="Other Instructor", email="detail-other@test.com", password="x", role="instructor")
+        db.add_all([instructor, learner, other])
+        db.commit()
+        learner_id = learner.id
+        small_id, big_id = seed_course(db, instructor, 2), seed_course(db, instructor, 20)
+        db.add(models.Enrolment(user=learner, course_id=big_id))
+        db.commit()
+        owner, learner_headers, other_headers = auth_headers(instructor.email), auth_headers(learner.email), auth_headers(other.email)
+
+        # 1. Payloads match the uncached ones for every kind of viewer, cold and warm
+        for headers, owner_view, viewer_id in ((other_headers, False, None), (learner_headers, False, learner_id), (owner, True, None)):
+            for _ in range(2):
+                resp, _ = get_course(big_id, headers)
+                if resp.status_code != 200 or resp.json() != expected_payload(db, big_id, owner_view, viewer_id):
+                    print(f"Error: payload differs for {'owner' if owner_view else 'viewer'} {viewer_id}.")
+                    return False
+        print("Success: cached payloads match the uncached ones for learner, owner and other instructor views.")
+
+        # 2. Warm requests cost the same few queries whatever the course size
+        main.invalidate_course_detail(big_id)
+        _, cold = get_course(big_id, learner_headers)
+        _, warm_big = get_course(big_id, learner_headers)
+        get_course(small_id, learner_headers)
+        _, warm_small = get_course(small_id, learner_headers)
+        if warm_big != warm_small or warm_big >= cold:
+            print(f"Error: cold {cold}, warm {warm_big} (20 modules) vs {warm_small} (2 modules) queries.")
+            return False
+        print(f"Success: {cold} queries cold, {warm_big} warm for 2 or 20 modules.")
+
+        # 3. Per-user flags and enrolments stay live while the structure is cached
+        db.add_all([models.QuizResult(user_id=learner_id, course_id=big_id, score=5, total_questions=5),
+                    models.Certificate(user_id=learner_id, course_id=big_id)])
+        db.commit()
+        client.post(f"/courses/{small_id}/enroll", headers=learner_headers)
+        big, small = get_course(big_id, learner_headers)[0].json(), get_course(small_id, learner_headers)[0].json()
+        if not (big["isAssessmentCompleted"] and big["hasCertificate"]) or small["enrolledStudents"] != [learner_id]:
+            print("Error: per-user flags or enrolments served stale.")
+            return False
+        print("Success: per-user flags and enrolments are computed per request.")
+
+        # 4. Updates, unpublishing and deletes invalidate the cache
+        payload = {"title": "Renamed", "description": "Changed", "status": "Published", "modules": [], "assessment": []}
+        client.put(f"/courses/{small_id}", json=payload, headers=owner)
+        renamed = get_course(small_id, learner_headers)[0].json()
+        if renamed != expected_payload(db, small_id, False, learner_id) or renamed["title"] != "Renamed" or renamed["modules"]:
+            print("Error: update not reflected.")
+            return False
+        client.put(f"/courses/{small_id}/status", json={"status": "Draft"}, headers=owner)
+        if get_course(small_id, learner_headers)[0].status_code != 403 or get_course(small_id, owner)[0].json()["status"] != "Draft":
+            print("Error: unpublishing not reflected.")
+            return False
+        client.delete(f"/courses/{small_id}", headers=owner)
+        if get_course(small_id, owner)[0].status_code != 404:
+            print("Error: deleted course still served.")
+            return False
+        print("Success: update, status change and delete invalidate the cached payload.")
+        return True
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if test_course_detail_cache():
+        print("\nCOURSE DETAIL CACHE TEST PASSED!")
+    else:
+        print("\nCOURSE DETAIL CACHE TEST FAILED!")
+        sys.exit(1)
@@ -0,0 +1,83 @@
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'course_search.db')}"
+
+from fastapi.testclient import TestClient
+
+import database, models, search
+import main
+
+client = TestClient(main.app)
+
+def titles(q, extra=""):
+    resp = client.get(f"/courses?q={q}{extra}")
+    if resp.status_code != 200:
+        raise RuntimeError(f"Search for '{q}' returned {resp.status_code}: {resp.text}")
+    data = resp.json()
+    return [c["title"] for c in (data["items"] if isinstance(data, dict) else data)]
+
+def test_course_search():
+    print("Testing full-text course search...")
+    if not search.FTS_ENABLED:
+        print("Error: FTS5 index was not set up.")
+        return False
+
+    db = database.SessionLocal()
+    try:
+        db.add_all([
+            models.Course(title="Cooking for Beginners", description="Recipes that mention python once", status="Published"),
+            models.Course(title="Python Programming", description="Learn Python from scratch", status="Published"),
+            models.Course(title="Data Science", description="Pandas and NumPy with Python", status="Published"),
+            models.Course(title="Python Internals", description="Draft", status="Draft"),
+        ])
+        db.commit()
+
+        # 1. Ranked: title matches before description-only matches; drafts excluded
+        found = titles("python")
+        if found[0] != "Python Programming" or set(found) != {"Python Programming", "Data Science", "Cooking for Beginners"}:
+            print(f"Error: unexpected ranking {found}")
+            return False
+        print(f"Success: ranked results {found}")
+
+        # 2. Prefix and multi-word matching
+        if titles("progr") != ["Python Programming"] or titles("pandas pyth") != ["Data Science"]:
+            print("Error: prefix / multi-word search failed.")
+            return False
+        print("Success: prefix and multi-word matches.")
+
+        # 3. Updates and deletes are reflected through the triggers
+        course = db.query(models.Course).filter(models.Course.title == "Data Science").first()
+        course.title = "Machine Learning"
+        course.description = "Models and training"
+        db.commit()
+        if titles("pandas") or titles("machine") != ["Machine Learning"]:
+            print("Error: update not reflected in the index.")
+            return False
+        db.delete(course)
+        db.commit()
+        if titles("machine"):
+            print("Error: deleted course still found.")
+            return False
+        print("Success: index follows updates and deletes.")
+
+        # 4. Paged search keeps working; odd input does not break the query
+        if titles("python", "&limit=1") != ["Cooking for Beginners"] or titles('"*)') is None:
+            print("Error: paged or punctuation-only search failed.")
+            return False
+        print("Success: paged and punctuation-only searches.")
+        return True
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if test_course_search():
+        print("\nCOURSE SEARCH TEST PASSED!")
+    else:
+        print("\nCOURSE SEARCH TEST FAILED!")
+        sys.exit(1)
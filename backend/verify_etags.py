@@ -0,0 +1,147 @@
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'etags.db')}"
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+from scratch_index import use_scratch_index
+
+# Keep the RAG index, its journal and debug log out of backend/ as well
+use_scratch_index(tmp_dir)
+
+client = TestClient(main.app)
+
+def auth_headers(email):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': email})}"}
+
+class QueryCounter:
+    def __enter__(self):
+        self.count = 0
+        event.listen(database.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(database.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def revalidate(path, headers, etag):
+    """Status of a conditional GET with If-None-Match: etag."""
+    resp = client.get(path, headers={**headers, "If-None-Match": etag})
+    if resp.status_code == 304 and resp.content:
+        raise RuntimeError(f"304 for {path} carried a body")
+    return resp.status_code
+
+def check_endpoint(name, path, headers, change, fewer_queries=True):
+    """200 with an ETag, 304 when revalidated (with fewer queries if asked), 200 with a new ETag after change()."""
+    resp = client.get(path, headers=headers)
+    etag = resp.headers.get("etag")
+    if resp.status_code != 200 or not etag or etag.startswith("W/"):
+        print(f"Error: {name} returned {resp.status_code} with ETag {etag}")
+        return False
+    if revalidate(path, headers, etag) != 304 or revalidate(path, headers, f'W/{etag}, "other"') != 304:
+        print(f"Error: {name} not revalidated to 304.")
+        return False
+    if revalidate(path, headers, '"stale"') != 200:
+        print(f"Error: {name} answered 304 to a stale ETag.")
+        return False
+    # The tag comes from version inputs, so a 304 skips the queries behind the body
+    with QueryCounter() as full:
+        client.get(path, headers=headers)
+    with QueryCounter() as conditional:
+        revalidate(path, headers, etag)
+    if fewer_queries and conditional.count >= full.count:
+        print(f"Error: {name} ran {conditional.count} queries for a 304 (full response: {full.count}).")
+        return False
+    change()
+    resp = client.get(path, headers={**headers, "If-None-Match": etag})
+    if resp.status_code != 200 or resp.headers.get("etag") == etag:
+        print(f"Error: {name} still {resp.status_code} after a change.")
+        return False
+    print(f"Success: {name} revalidates to 304 and changes its ETag after an update.")
+    return True
+
+def test_etags():
+    print("Testing ETags and conditional GETs...")
+    db = database.SessionLocal()
+    try:
+        instructor = models.User(name="Tag Owner", email="tag-owner@test.com", password="x", role="instructor")
+        learner = models.User(name="Tag Learner", email="tag-learner@test.com", password="x", role="learner")
+        course = models.Course(title="Tagged", description="x", status="Published", instructor=instructor)
+        course.modules = [models.Module(title="M0")]
+        course.assessment = [models.Question(questionText="Q", questionType="mcq", correctOptionIndex=0,
+                                             options=[models.QuestionOption(text="A"), models.QuestionOption(text="B")])]
+        db.add_all([course, learner, models.Enrolment(user=learner, course=course),
+                    models.Badge(name="Newbie", description="First steps", icon="star")])
+        db.commit()
+        course_id = course.id
+    finally:
+        db.close()
+    owner, learner_headers = auth_headers("tag-owner@test.com"), auth_headers("tag-learner@test.com")
+
+    def rename_course():
+        course = client.get(f"/courses/{course_id}", headers=owner).json()
+        payload = {"title": "Tagged v2", "description": "x", "status": "Published",
+                   "modules": [{"id": m["id"], "title": m["title"], "quiz": []} for m in course["modules"]],
+                   "assessment": course["assessment"]}
+        client.put(f"/courses/{course_id}", json=payload, headers=owner)
+
+    def add_course():
+        client.post("/courses", json={"title": "New", "description": "x", "modules": [], "assessment": []}, headers=owner)
+
+    def add_badge():
+        db = database.SessionLocal()
+        try:
+            db.add(models.Badge(name="Legend", description="All done", icon="crown"))
+            db.commit()
+        finally:
+            db.close()
+
+    def submit_assessment():
+        client.post(f"/quizzes/{course_id}/submit", json={"answers": [0]}, headers=learner_headers)
+
+    # GET /courses/{id} serves its structure from a cache either way; its
+    # per-viewer queries are part of the tag
+    if not check_endpoint("GET /courses/{id}", f"/courses/{course_id}", learner_headers, rename_course, fewer_queries=False):
+        return False
+    checks = [
+        ("GET /courses", "/courses", add_course),
+        ("GET /courses pages", "/courses?limit=5&fields=id,title", add_course),
+        ("GET /courses after an edit", "/courses?fields=id,title", rename_course),
+        ("GET /badges/all", "/badges/all", add_badge),
+        ("GET /quizzes/{course_id}", f"/quizzes/{course_id}", submit_assessment),
+    ]
+    if not all(check_endpoint(name, path, learner_headers, change) for name, path, change in checks):
+        return False
+
+    # Per-user state is part of the course ETag: same course, different viewers
+    learner_tag = client.get(f"/courses/{course_id}", headers=learner_headers).headers["etag"]
+    if revalidate(f"/courses/{course_id}", owner, learner_tag) != 200:
+        print("Error: owner view revalidated against the learner's ETag.")
+        return False
+
+    # A 304 on a warm course is served without rebuilding the payload
+    misses = main.COURSE_DETAIL_CACHE.misses
+    if revalidate(f"/courses/{course_id}", learner_headers, learner_tag) != 304 or main.COURSE_DETAIL_CACHE.misses != misses:
+        print("Error: revalidation rebuilt the course payload.")
+        return False
+    print("Success: course ETags are per viewer and revalidate from the cached structure.")
+    return True
+
+if __name__ == "__main__":
+    if test_etags():
+        print("\nETAG TEST PASSED!")
+    else:
+        print("\nETAG TEST FAILED!")
+        sys.exit(1)
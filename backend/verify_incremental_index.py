@@ -0,0 +1,83 @@
+import sys
+import os
+import json
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+import rag
+from scratch_index import use_scratch_index
+
+def reset_memory():
+    """Simulate a fresh process: drop everything held in memory."""
+    rag.VECTOR_STORE = None
+    rag.MAPPED_INDEX = None
+
+def test_incremental_updates():
+    print("Testing incremental RAG indexing...")
+    use_scratch_index()
+
+    rag.index_content([
+        {"id": 1, "title": "Python Basics", "description": "Learn Python", "modules": []},
+        {"id": 2, "title": "Java Basics", "description": "Learn Java", "modules": []}
+    ])
+    index_mtime = os.path.getmtime(rag.INDEX_FILE)
+
+    # 1. Add, update and remove without touching the base index file
+    reset_memory()
+    rag.upsert_course({"id": 3, "title": "Rust Basics", "description": "Learn Rust", "modules": []})
+    rag.upsert_course({"id": 2, "title": "Kotlin Basics", "description": "Learn Kotlin", "modules": []})
+    rag.remove_course(1)
+
+    if os.path.getmtime(rag.INDEX_FILE) != index_mtime:
+        print("Error: base index file was rewritten by an incremental update.")
+        return False
+    if "Rust Basics" not in rag.retrieve("rust", top_k=1)[0]:
+        print("Error: added course not retrievable.")
+        return False
+    if any("Java" in text or "Python" in text for text in rag.retrieve("java python", top_k=5)):
+        print("Error: updated/removed course still retrievable.")
+        return False
+    print("Success: deltas applied in memory.")
+
+    # 2. Deltas survive a restart through the journal
+    reset_memory()
+    texts = rag.retrieve("basics", top_k=5)
+    if sorted(texts) != ["Course: Kotlin Basics Description: Learn Kotlin", "Course: Rust Basics Description: Learn Rust"]:
+        print(f"Error: journal replay produced {texts}")
+        return False
+    print("Success: journal replayed after restart.")
+
+    # 3. The replay is compacted, so the next start maps the base index cold
+    reset_memory()
+    if os.path.exists(rag.JOURNAL_FILE):
+        print("Error: journal not cleared by compaction.")
+        return False
+    texts = rag.retrieve("basics", top_k=5)
+    if rag.MAPPED_INDEX is None or rag.VECTOR_STORE is not None or len(texts) != 2:
+        print(f"Error: compacted index wrong: {texts}")
+        return False
+    print("Success: compacted index is mapped and complete.")
+
+    # 4. A store from before per-course updates has no course ids and must be rebuilt
+    use_scratch_index()
+    with open(rag.JSON_INDEX_FILE, "w") as f:
+        json.dump([{"text": "Course: Old Title Description: Old", "embedding": {"course:": 1, "old": 2, "title": 1}}], f)
+    reset_memory()
+    if not rag.is_indexed() or rag.is_current():
+        print("Error: legacy store without course ids reported as current.")
+        return False
+    rag.index_content([{"id": 1, "title": "New Title", "description": "New", "modules": []}])
+    reset_memory()
+    if not rag.is_current() or any("Old" in text for text in rag.retrieve("old title", top_k=5)):
+        print("Error: rebuilt index still stale.")
+        return False
+    print("Success: legacy store flagged for a full rebuild.")
+    return True
+
+if __name__ == "__main__":
+    if test_incremental_updates():
+        print("\nINCREMENTAL INDEX TEST PASSED!")
+    else:
+        print("\nINCREMENTAL INDEX TEST FAILED!")
+        sys.exit(1)
@@ -0,0 +1,89 @@
+import sys
+import os
+import tempfile
+import inspect
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'password_hashing.db')}"
+
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+
+client = TestClient(main.app)
+
+def stored_hash(email):
+    db = database.SessionLocal()
+    try:
+        return db.query(models.User.password).filter(models.User.email == email).scalar()
+    finally:
+        db.close()
+
+def login_status(email, password):
+    return client.post("/auth/login", json={"username": email, "password": password}).status_code
+
+def test_password_hashing():
+    print("Testing offloaded password hashing and rehash-on-login...")
+
+    # 1. Hashing runs in the worker processes
+    if auth._hash_pool().submit(os.getpid).result() == os.getpid():
+        print("Error: hashing pool runs in the request process.")
+        return False
+    # Async handlers: a login waiting for its hash holds no threadpool thread
+    if not all(inspect.iscoroutinefunction(handler) for handler in (main.register, main.login, main.reset_password)):
+        print("Error: auth handlers block a threadpool thread while hashing.")
+        return False
+    resp = client.post("/auth/register", json={"name": "Hash", "email": "hash@example.com", "password": "pw-1", "role": "learner"})
+    current = stored_hash("hash@example.com")
+    if resp.status_code != 200 or auth.pwd_context.needs_update(current) or login_status("hash@example.com", "pw-1") != 200:
+        print(f"Error: register/login with current parameters failed: {resp.status_code} {current}")
+        return False
+    print(f"Success: registered with {auth.PASSWORD_SCHEME} at the configured cost, in a separate process.")
+
+    # 2. Hashes from older parameters still log in and are upgraded on the way
+    legacy = {
+        "cheap@example.com": auth.make_pwd_context(pbkdf2_rounds=1000).hash("pw-2"),
+        "costly@example.com": auth.make_pwd_context(pbkdf2_rounds=auth.PBKDF2_ROUNDS * 2).hash("pw-2"),
+    }
+    db = database.SessionLocal()
+    try:
+        db.add_all([models.User(name=email, email=email, password=hashed, role="learner") for email, hashed in legacy.items()])
+        db.commit()
+    finally:
+        db.close()
+    for email, old_hash in legacy.items():
+        if login_status(email, "wrong") != 401 or stored_hash(email) != old_hash:
+            print(f"Error: failed login for {email} changed or accepted the hash.")
+            return False
+        if login_status(email, "pw-2") != 200:
+            print(f"Error: {email} could not log in with a legacy hash.")
+            return False
+        upgraded = stored_hash(email)
+        if upgraded == old_hash or auth.pwd_context.needs_update(upgraded) or login_status(email, "pw-2") != 200:
+            print(f"Error: {email} not rehashed to the current parameters.")
+            return False
+    print("Success: hashes at an older cost are rehashed on the next successful login.")
+
+    # 3. A dead worker breaks the pool; it is replaced instead of failing every login
+    broken = auth._hash_pool()
+    for process in list(broken._processes.values()):
+        process.kill()
+        process.join()
+    if login_status("hash@example.com", "pw-1") != 200 or auth._hash_pool() is broken:
+        print("Error: logins still fail after a hashing worker died.")
+        return False
+    print("Success: a broken hashing pool is replaced on the next login.")
+    return True
+
+if __name__ == "__main__":
+    ok = test_password_hashing()
+    auth.shutdown_hash_pool()
+    if ok:
+        print("\nPASSWORD HASHING TEST PASSED!")
+    else:
+        print("\nPASSWORD HASHING TEST FAILED!")
+        sys.exit(1)
@@ -0,0 +1,90 @@
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'principal_cache.db')}"
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+
+client = TestClient(main.app)
+
+def users_queries(token):
+    """Authenticate once; returns (principal, number of queries against users)."""
+    # Not counting the periodic token revocation sync
+    auth.sync_token_versions()
+    count = 0
+    def on_execute(conn, cursor, statement, *args):
+        nonlocal count
+        if "FROM users" in statement:
+            count += 1
+    event.listen(database.engine, "before_cursor_execute", on_execute)
+    db = database.SessionLocal()
+    try:
+        return auth.get_current_user(token, db), count
+    finally:
+        db.close()
+        event.remove(database.engine, "before_cursor_execute", on_execute)
+
+def test_principal_cache():
+    print("Testing the authenticated principal cache...")
+    db = database.SessionLocal()
+    try:
+        db.add(models.User(name="Cached User", email="cached@test.com", password=auth.get_password_hash("old-pass"), role="learner"))
+        db.commit()
+    finally:
+        db.close()
+    token = auth.create_access_token({"sub": "cached@test.com"})
+
+    # 1. Only the first request looks the user up
+    first, cold = users_queries(token)
+    first["role"] = "instructor"
+    second, warm = users_queries(token)
+    if cold != 1 or warm != 0 or second["role"] != "learner":
+        print(f"Error: {cold} then {warm} users queries, role {second['role']}")
+        return False
+    print("Success: repeat requests skip the users lookup and get their own copy.")
+
+    # 2. Password reset drops the cached principal
+    db = database.SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == "cached@test.com").first()
+        user.name, user.reset_otp = "Renamed User", "123456"
+        db.commit()
+    finally:
+        db.close()
+    if client.post("/auth/reset-password", json={"token": "123456", "new_password": "new-pass"}).status_code != 200:
+        print("Error: password reset failed.")
+        return False
+    # The reset also revoked the old token (see verify_token_revocation.py)
+    token = auth.create_access_token({"sub": "cached@test.com", "ver": 1})
+    principal, queries = users_queries(token)
+    if queries != 1 or principal["name"] != "Renamed User":
+        print("Error: cached principal survived the password reset.")
+        return False
+    print("Success: password reset invalidates the cached principal.")
+
+    # 3. Bad tokens and unknown users are still rejected
+    if client.get("/notifications", headers={"Authorization": "Bearer bogus"}).status_code != 401:
+        print("Error: bad token accepted.")
+        return False
+    ghost = auth.create_access_token({"sub": "ghost@test.com"})
+    if client.get("/notifications", headers={"Authorization": f"Bearer {ghost}"}).status_code != 401:
+        print("Error: unknown user accepted.")
+        return False
+    print("Success: invalid tokens and unknown users get 401.")
+    return True
+
+if __name__ == "__main__":
+    if test_principal_cache():
+        print("\nPRINCIPAL CACHE TEST PASSED!")
+    else:
+        print("\nPRINCIPAL CACHE TEST FAILED!")
+        sys.exit(1)
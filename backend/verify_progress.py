@@ -0,0 +1,194 @@
+import sys
+import os
+import csv
+import io
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'progress.db')}"
+
+from fastapi.testclient import TestClient
+
+import database, models, auth, progress
+import main
+from scratch_index import use_scratch_index
+
+# Keep the RAG index, its journal and debug log out of backend/ as well
+use_scratch_index(tmp_dir)
+
+client = TestClient(main.app)
+
+def auth_headers(user):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': user.email})}"}
+
+def mcq(text, **kwargs):
+    options = [models.QuestionOption(text=t) for t in ("right", "wrong")]
+    return models.Question(questionText=text, questionType="mcq", correctOptionIndex=0, options=options, **kwargs)
+
+def expected_row(db, enrolment):
+    """Progress recomputed from the raw quiz results, the way the report used to."""
+    modules = [m.id for m in db.query(models.Module).filter(models.Module.course_id == enrolment.course_id)]
+    results = db.query(models.QuizResult).filter(
+        models.QuizResult.user_id == enrolment.user_id, models.QuizResult.module_id.in_(modules)
+    ).all()
+    scored = [r.score / r.total_questions * 100 for r in results if r.total_questions > 0]
+    finals = db.query(models.QuizResult).filter(
+        models.QuizResult.user_id == enrolment.user_id,
+        models.QuizResult.course_id == enrolment.course_id,
+        models.QuizResult.module_id.is_(None)
+    ).order_by(models.QuizResult.id).all()
+    return {
+        "completed_modules": len({r.module_id for r in results}),
+        "total_modules": len(modules),
+        "module_quiz_avg": round(sum(scored) / len(scored), 6) if scored else None,
+        "final_score": finals[0].score * 100 // finals[0].total_questions if finals else None,
+        "final_attempts": len(finals)
+    }
+
+def stored_row(db, enrolment):
+    row = db.query(models.EnrolmentProgress).filter(models.EnrolmentProgress.enrolment_id == enrolment.id).first()
+    if not row:
+        return None
+    return {
+        "completed_modules": row.completed_modules,
+        "total_modules": row.total_modules,
+        "module_quiz_avg": round(row.module_quiz_avg, 6) if row.module_quiz_avg is not None else None,
+        "final_score": row.final_score,
+        "final_attempts": row.final_attempts
+    }
+
+def check(db, enrolment, step):
+    db.expire_all()
+    expected, stored = expected_row(db, enrolment), stored_row(db, enrolment)
+    if stored != expected:
+        print(f"Error: after {step} stored progress {stored} != recomputed {expected}")
+        return False
+    print(f"Success: after {step} progress is {stored['completed_modules']}/{stored['total_modules']}.")
+    return True
+
+def course_payload(course, extra_module=None, drop_module_id=None):
+    """A PUT /courses/{id} body that keeps the course as it is, optionally adding or dropping a module."""
+    def question(q):
+        return {"id": q.id, "questionText": q.questionText, "questionType": q.questionType,
+                "correctOptionIndex": q.correctOptionIndex, "options": [{"text": o.text} for o in q.options]}
+    modules = [
+        {"id": m.id, "title": m.title, "contentLink": m.contentLink, "quiz": [question(q) for q in m.quiz]}
+        for m in course.modules if m.id != drop_module_id
+    ]
+    if extra_module:
+        modules.append({"title": extra_module, "quiz": []})
+    return {"title": course.title, "description": course.description, "status": course.status,
+            "modules": modules, "assessment": [question(q) for q in course.assessment]}
+
+def test_progress():
+    print("Testing materialized enrolment progress...")
+    db = database.SessionLocal()
+    try:
+        instructor = models.User(name="Prog Instructor", email="prog-instructor@test.com", password="x", role="instructor")
+        learner = models.User(name="Prog Learner", email="prog-learner@test.com", password="x", role="learner")
+        walk_in = models.User(name="Prog Walk-in", email="prog-walkin@test.com", password="x", role="learner")
+        course = models.Course(title="Progress Course", description="Tracked", status="Published", instructor=instructor)
+        course.modules = [
+            models.Module(title=f"Module {m}", quiz=[mcq(f"M{m} Q{q}") for q in range(2)]) for m in range(2)
+        ]
+        course.assessment = [mcq(f"Final Q{q}") for q in range(2)]
+        db.add_all([course, learner, walk_in])
+        db.commit()
+        course_id, module_ids = course.id, [m.id for m in course.modules]
+        learner_headers, instructor_headers = auth_headers(learner), auth_headers(instructor)
+
+        # 1. Enrolling creates an empty row
+        if client.post(f"/courses/{course_id}/enroll", headers=learner_headers).status_code != 200:
+            print("Error: enrolment failed.")
+            return False
+        enrolment = db.query(models.Enrolment).filter(models.Enrolment.user_id == learner.id).first()
+        if not check(db, enrolment, "enrolment"):
+            return False
+
+        # 2. Module quizzes, including a resubmission of the same module
+        for module_id, answers in ((module_ids[0], [0, 1]), (module_ids[0], [0, 0]), (module_ids[1], [1, 1])):
+            resp = client.post(f"/modules/{module_id}/quiz/submit", json={"total_questions": 2, "answers": answers},
+                               headers=learner_headers)
+            if resp.status_code != 200:
+                print(f"Error: module quiz submit returned {resp.status_code}: {resp.text}")
+                return False
+            if not check(db, enrolment, f"module {module_id} quiz"):
+                return False
+
+        # 3. Completing every module quiz awards the badge and batch, enrolled or not
+        for user in (learner, walk_in):
+            if user is walk_in:
+                for module_id in module_ids:
+                    resp = client.post(f"/modules/{module_id}/quiz/submit", json={"total_questions": 2, "answers": [0, 0]},
+                                       headers=auth_headers(walk_in))
+                    if resp.status_code != 200:
+                        print(f"Error: walk-in quiz submit returned {resp.status_code}: {resp.text}")
+                        return False
+            db.expire_all()
+            badges = [b.name for b in user.badges]
+            batches = [b.name for b in db.query(models.Batch).filter(models.Batch.course_id == course_id)
+                       if user in b.students]
+            if badges != ["Progress Course Graduate"] or len(batches) != 1:
+                print(f"Error: {user.email} has badges {badges} and batches {batches}")
+                return False
+        print("Success: badge and batch awarded with and without an enrolment.")
+
+        # 4. Final assessment: a failed first attempt, then the retake
+        for answers in ([1, 1], [0, 0]):
+            resp = client.post(f"/quizzes/{course_id}/submit", json={"answers": answers}, headers=learner_headers)
+            if resp.status_code != 200:
+                print(f"Error: final submit returned {resp.status_code}: {resp.text}")
+                return False
+            if not check(db, enrolment, "final assessment"):
+                return False
+
+        # 5. The report is served from the stored row
+        resp = client.get(f"/courses/{course_id}/reports/performance", headers=instructor_headers)
+        rows = list(csv.reader(io.StringIO(resp.text)))
+        if resp.status_code != 200 or rows[1][1:] != ["prog-learner@test.com", "100%", "50%", "Completed", "0%"]:
+            print(f"Error: unexpected report {rows}")
+            return False
+        print("Success: performance report matches the stored progress.")
+
+        # 6. Adding and removing modules updates everyone's totals
+        db.expire_all()
+        resp = client.put(f"/courses/{course_id}", json=course_payload(course, extra_module="Module 2"), headers=instructor_headers)
+        if resp.status_code != 200 or not check(db, enrolment, "adding a module"):
+            print(f"Error: course update returned {resp.status_code}: {resp.text}")
+            return False
+        db.expire_all()
+        resp = client.put(f"/courses/{course_id}", json=course_payload(course, drop_module_id=module_ids[1]), headers=instructor_headers)
+        if resp.status_code != 200 or not check(db, enrolment, "removing a module"):
+            print(f"Error: course update returned {resp.status_code}: {resp.text}")
+            return False
+
+        # 7. Backfill fills in rows for enrolments that have none
+        db.query(models.EnrolmentProgress).delete()
+        db.commit()
+        progress.backfill(database.engine)
+        if not check(db, enrolment, "backfill"):
+            return False
+
+        # 8. Deleting the course removes its progress rows
+        if client.delete(f"/courses/{course_id}", headers=instructor_headers).status_code != 200:
+            print("Error: course delete failed.")
+            return False
+        db.expire_all()
+        if db.query(models.EnrolmentProgress).filter(models.EnrolmentProgress.course_id == course_id).count():
+            print("Error: progress rows outlived their course.")
+            return False
+        print("Success: progress rows removed with the course.")
+        return True
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if test_progress():
+        print("\nPROGRESS TEST PASSED!")
+    else:
+        print("\nPROGRESS TEST FAILED!")
+        sys.exit(1)
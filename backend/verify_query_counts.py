@@ -0,0 +1,252 @@
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_counts.db')}"
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+import database, models, auth, progress
+import main
+
+client = TestClient(main.app)
+
+class QueryCounter:
+    """Counts SQL statements executed on the app's engine inside a with-block."""
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(database.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(database.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def seed_catalog(db, n_courses, learners_per_course=3):
+    """Add n_courses published courses, each with its own instructor and a few enrolled learners."""
+    start = db.query(models.Course).count()
+    for i in range(start, start + n_courses):
+        instructor = models.User(name=f"Instructor {i}", email=f"instructor{i}@test.com", password="x", role="instructor")
+        course = models.Course(title=f"Course {i}", description="Seeded course", status="Published", instructor=instructor)
+        db.add(course)
+        for j in range(learners_per_course):
+            learner = models.User(name=f"Learner {i}-{j}", email=f"learner{i}-{j}@test.com", password="x")
+            db.add(models.Enrolment(user=learner, course=course))
+    db.commit()
+
+def auth_headers(user):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': user.email})}"}
+
+def seed_learning(db, learner, n_courses, modules_per_course=4):
+    """Enrol learner in n_courses new courses; results exist for the first i % modules_per_course modules of course i."""
+    expected = {}
+    for i in range(n_courses):
+        course = models.Course(title=f"Learning {learner.id}-{i}", description="Seeded", status="Published")
+        modules = [models.Module(title=f"Module {m}", course=course) for m in range(modules_per_course)]
+        db.add_all([course, models.Enrolment(user=learner, course=course)] + modules)
+        done = i % modules_per_course
+        for module in modules[:done]:
+            # Two attempts on the same module still count once
+            db.add_all([models.QuizResult(user=learner, module=module, score=1, total_questions=1) for _ in range(2)])
+        db.flush()
+        expected[course.id] = int(done / modules_per_course * 100)
+    # Seeded directly, so bring the materialized progress up to date
+    progress.rebuild_all(db)
+    db.commit()
+    return expected
+
+def queries_for(path, headers=None):
+    # Count every request with a cold principal cache and no revocation sync due,
+    # so sizes compare like for like
+    auth.PRINCIPAL_CACHE.clear()
+    auth.sync_token_versions()
+    with QueryCounter() as counter:
+        resp = client.get(path, headers=headers)
+    if resp.status_code != 200:
+        raise RuntimeError(f"GET {path} returned {resp.status_code}: {resp.text}")
+    return counter.count, resp.json()
+
+def test_course_catalog():
+    print("Testing GET /courses query count...")
+    db = database.SessionLocal()
+    try:
+        seed_catalog(db, 10)
+        small, courses = queries_for("/courses")
+        seed_catalog(db, 90)
+        large, courses = queries_for("/courses")
+    finally:
+        db.close()
+
+    if len(courses) != 100 or any(len(c["enrolledStudents"]) != 3 or not c["instructor"] for c in courses):
+        print("Error: catalog payload incomplete.")
+        return False
+    if large != small:
+        print(f"Error: {small} queries for 10 courses but {large} for 100.")
+        return False
+    print(f"Success: {large} queries for 10 and 100 courses.")
+    return True
+
+def test_course_pages():
+    print("Testing paginated GET /courses...")
+    seen, page_queries, cursor = [], set(), None
+    while True:
+        path = "/courses?limit=30" + (f"&cursor={cursor}" if cursor else "")
+        count, page = queries_for(path)
+        page_queries.add(count)
+        seen.extend(item["id"] for item in page["items"])
+        if any("enrolledStudents" in item or item["enrolmentCount"] != 3 for item in page["items"]):
+            print("Error: paged items should carry enrolmentCount only.")
+            return False
+        cursor = page["nextCursor"]
+        if not cursor:
+            break
+
+    _, all_courses = queries_for("/courses")
+    if seen != [c["id"] for c in all_courses]:
+        print("Error: pages do not cover the catalog exactly once, in order.")
+        return False
+    if len(page_queries) != 1:
+        print(f"Error: query count varies between pages: {sorted(page_queries)}")
+        return False
+    print(f"Success: {len(seen)} courses in 30-item pages, {page_queries.pop()} queries per page.")
+
+    _, page = queries_for("/courses?limit=5&fields=id,title")
+    if any(set(item) != {"id", "title"} for item in page["items"]):
+        print("Error: field projection not applied.")
+        return False
+    if client.get("/courses?fields=password").status_code != 400 or client.get("/courses?cursor=bogus").status_code != 400:
+        print("Error: bad fields / cursor not rejected.")
+        return False
+    if client.get(f"/courses?limit={main.MAX_PAGE_SIZE + 1}").status_code != 422:
+        print("Error: page size limit not enforced.")
+        return False
+    print("Success: projection and validation work.")
+    return True
+
+def test_my_courses():
+    print("Testing GET /courses/my-courses query count...")
+    db = database.SessionLocal()
+    try:
+        learner = models.User(name="Busy Learner", email="busy@test.com", password="x", role="learner")
+        db.add(learner)
+        db.commit()
+        learner_id = learner.id
+        headers = auth_headers(learner)
+
+        expected = seed_learning(db, learner, 5)
+        small, courses = queries_for("/courses/my-courses", headers)
+        expected.update(seed_learning(db, learner, 45))
+        large, courses = queries_for("/courses/my-courses", headers)
+    finally:
+        db.close()
+
+    if {c["id"]: c["progress"] for c in courses} != expected:
+        print("Error: progress differs from the expected per-course values.")
+        return False
+    if any(c["enrolledStudents"] != [learner_id] for c in courses):
+        print("Error: enrolledStudents wrong.")
+        return False
+    if large != small:
+        print(f"Error: {small} queries for 5 courses but {large} for 50.")
+        return False
+    print(f"Success: {large} queries for 5 and 50 enrolled courses.")
+    return True
+
+def seed_roster(db, instructor, courses, n_learners, start=0):
+    """Learners enrolled in 1-3 of the instructor's courses with varying quiz progress."""
+    for i in range(start, start + n_learners):
+        learner = models.User(name=f"{chr(65 + i * 7 % 26)}earner {i}", email=f"roster{instructor.id}-{i}@test.com", password="x")
+        for k, course in enumerate(courses[:1 + i % len(courses)]):
+            db.add(models.Enrolment(user=learner, course=course, accessibility_enabled=(i + k) % 2 == 0))
+            for module in course.modules[:(i + k) % (len(course.modules) + 1)]:
+                db.add(models.QuizResult(user=learner, module=module, score=1, total_questions=1))
+    db.flush()
+    progress.rebuild_all(db)
+    db.commit()
+
+def expected_roster(db, instructor_id):
+    """The roster as the original per-enrolment loop computed it."""
+    course_ids = [c.id for c in db.query(models.Course).filter(models.Course.instructor_id == instructor_id)]
+    students = {}
+    for e in db.query(models.Enrolment).filter(models.Enrolment.course_id.in_(course_ids)).order_by(models.Enrolment.id):
+        modules = [m.id for m in e.course.modules]
+        done = db.query(models.QuizResult.module_id).filter(
+            models.QuizResult.user_id == e.user_id, models.QuizResult.module_id.in_(modules)
+        ).distinct().count()
+        pct = int(done / len(modules) * 100) if modules else 0
+        s = students.setdefault(e.user_id, {"id": e.user_id, "courses": [], "scores": [], "enrolment_id": e.id,
+                                            "accessibility_enabled": e.accessibility_enabled})
+        s["courses"].append(e.course.title)
+        s["scores"].append(pct)
+    return [
+        {"id": s["id"], "courses": s["courses"], "progress": int(sum(s["scores"]) / len(s["scores"])),
+         "badges": ["Legend"] if 100 in s["scores"] else ["Newbie"],
+         "enrolment_id": s["enrolment_id"], "accessibility_enabled": s["accessibility_enabled"]}
+        for s in students.values()
+    ]
+
+def test_my_learners():
+    print("Testing GET /courses/my-learners query count...")
+    fields = ("id", "courses", "progress", "badges", "enrolment_id", "accessibility_enabled")
+    db = database.SessionLocal()
+    try:
+        instructor = models.User(name="Roster Owner", email="roster-owner@test.com", password="x", role="instructor")
+        courses = []
+        for c in range(3):
+            course = models.Course(title=f"Roster Course {c}", status="Published", instructor=instructor)
+            course.modules = [models.Module(title=f"M{m}") for m in range(c + 1)]
+            courses.append(course)
+        db.add_all(courses)
+        db.commit()
+        headers = auth_headers(instructor)
+
+        seed_roster(db, instructor, courses, 10)
+        small, roster = queries_for("/courses/my-learners", headers)
+        seed_roster(db, instructor, courses, 90, start=10)
+        large, roster = queries_for("/courses/my-learners", headers)
+        expected = expected_roster(db, instructor.id)
+    finally:
+        db.close()
+
+    if [{k: s[k] for k in fields} for s in roster] != expected:
+        print("Error: roster differs from the per-enrolment computation.")
+        return False
+    if large != small:
+        print(f"Error: {small} queries for 10 learners but {large} for 100.")
+        return False
+    print(f"Success: {large} queries for 10 and 100 learners, same roster as before.")
+
+    # Sorted pages cover everyone once
+    seen = []
+    for offset in range(0, 100, 40):
+        _, page = queries_for(f"/courses/my-learners?sort=progress&order=desc&limit=40&offset={offset}", headers)
+        seen.extend(page["items"])
+    scores = [s["progress"] for s in seen]
+    if page["total"] != 100 or sorted(s["id"] for s in seen) != sorted(s["id"] for s in roster) or scores != sorted(scores, reverse=True):
+        print("Error: progress-sorted pages wrong.")
+        return False
+    _, page = queries_for("/courses/my-learners?sort=name&limit=100", headers)
+    names = [s["name"].lower() for s in page["items"]]
+    if names != sorted(names):
+        print("Error: name sort wrong.")
+        return False
+    if client.get("/courses/my-learners?sort=email", headers=headers).status_code != 400:
+        print("Error: unknown sort accepted.")
+        return False
+    print("Success: server-side sorting and pagination.")
+    return True
+
+if __name__ == "__main__":
+    if test_course_catalog() and test_course_pages() and test_my_courses() and test_my_learners():
+        print("\nQUERY COUNT TEST PASSED!")
+    else:
+        print("\nQUERY COUNT TEST FAILED!")
+        sys.exit(1)
@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'results_export.db')}"
+
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+
+client = TestClient(main.app)
+
+def auth_headers(user):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': user.email})}"}
+
+def export(path, headers):
+    resp = client.get(path, headers=headers)
+    if resp.status_code != 200:
+        return resp.status_code, None
+    return resp.status_code, [json.loads(line) for line in resp.text.splitlines()]
+
+def test_results_export():
+    print("Testing JSON Lines quiz result export...")
+    db = database.SessionLocal()
+    try:
+        owner = models.User(name="Export Owner", email="export-owner@test.com", password="x", role="instructor")
+        other = models.User(name="Other Owner", email="other-owner@test.com", password="x", role="instructor")
+        alice = models.User(name="Alice", email="alice@test.com", password="x", role="learner")
+        bob = models.User(name="Bob", email="bob@test.com", password="x", role="learner")
+        courses = [models.Course(title=f"Course {c}", description="x", status="Published", instructor=owner) for c in range(2)]
+        foreign = models.Course(title="Foreign", description="x", status="Published", instructor=other)
+        for course in courses + [foreign]:
+            course.modules = [models.Module(title=f"{course.title} M{m}") for m in range(2)]
+        db.add_all(courses + [foreign, alice, bob])
+        db.flush()
+
+        db.add_all([
+            models.Enrolment(user=alice, course=courses[0]),
+            models.Enrolment(user=alice, course=courses[1]),
+            models.Enrolment(user=bob, course=courses[0]),
+            models.Enrolment(user=bob, course=foreign),
+            models.QuizResult(user=alice, module=courses[0].modules[0], score=3, total_questions=4, answers=[0, 1, 2, "x"]),
+            models.QuizResult(user=alice, course_id=courses[0].id, score=1, total_questions=3, answers=[2, 2, 2]),
+            models.QuizResult(user=alice, module=courses[1].modules[1], score=0, total_questions=0, answers=[]),
+            models.QuizResult(user=bob, module=courses[0].modules[1], score=2, total_questions=2, answers=[1, 0]),
+            models.QuizResult(user=bob, module=foreign.modules[0], score=1, total_questions=1, answers=[0]),
+            # Not enrolled in course 1: not part of its report
+            models.QuizResult(user=bob, module=courses[1].modules[0], score=1, total_questions=1, answers=[0]),
+        ])
+        db.commit()
+        course_ids = [c.id for c in courses]
+        owner_headers, other_headers, learner_headers = auth_headers(owner), auth_headers(other), auth_headers(alice)
+    finally:
+        db.close()
+
+    # 1. Single course
+    status, lines = export(f"/courses/{course_ids[0]}/reports/results", owner_headers)
+    if status != 200 or [(l["student_name"], l["type"]) for l in lines] != [("Alice", "module"), ("Alice", "final"), ("Bob", "module")]:
+        print(f"Error: unexpected course export {status} {lines}")
+        return False
+    first = lines[0]
+    if first["answers"] != [0, 1, 2, "x"] or first["percentage"] != 75.0 or first["module_title"] != "Course 0 M0" or not first["completed_at"]:
+        print(f"Error: record fields wrong: {first}")
+        return False
+    if lines[1]["module_id"] is not None or lines[1]["percentage"] != 33.33:
+        print(f"Error: final assessment record wrong: {lines[1]}")
+        return False
+    print(f"Success: {len(lines)} records for one course, numeric scores and answers included.")
+
+    # 2. Bulk export covers all of the instructor's courses and nothing else
+    status, lines = export("/api/instructor/reports/results", owner_headers)
+    if status != 200 or {l["course_id"] for l in lines} != set(course_ids) or len(lines) != 4:
+        print(f"Error: unexpected bulk export {status} {lines}")
+        return False
+    if lines[-1]["percentage"] != 0.0:
+        print("Error: zero-question result should report 0%.")
+        return False
+    print(f"Success: bulk export has {len(lines)} records across {len(course_ids)} courses.")
+
+    # 3. Access control
+    if export(f"/courses/{course_ids[0]}/reports/results", other_headers)[0] != 403 or \
+            export("/api/instructor/reports/results", learner_headers)[0] != 403:
+        print("Error: export not restricted to the course owner.")
+        return False
+    print("Success: only the owning instructor can export.")
+    return True
+
+if __name__ == "__main__":
+    if test_results_export():
+        print("\nRESULTS EXPORT TEST PASSED!")
+    else:
+        print("\nRESULTS EXPORT TEST FAILED!")
+        sys.exit(1)
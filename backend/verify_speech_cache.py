@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from groq import Groq
+
+import rag
+from cache import TTLCache
+from fake_llm_server import FakeLLMServer
+from scratch_index import use_scratch_index
+
+def test_speech_cache():
+    print("Testing the clean_speech cache...")
+    # clean_speech logs its LLM calls; keep that out of backend/rag_debug.log
+    use_scratch_index()
+    llm = FakeLLMServer(tokens=["What is the answer for gravity?"], token_delay=0.2).start()
+    rag.client = Groq(api_key="test", base_url=llm.base_url)
+    rag.SPEECH_CACHE.clear()
+
+    try:
+        # 1. Variants of one fragment share a single LLM call
+        variants = [
+            "Wh-what is the... the answer for... gravity",
+            "what is the answer for gravity",
+            "  WHAT is the the ANSWER for gravity?? ",
+        ]
+        if len({rag.normalize_speech(v) for v in variants}) != 1:
+            print(f"Error: variants normalize differently: {[rag.normalize_speech(v) for v in variants]}")
+            return False
+
+        start = time.perf_counter()
+        first = rag.clean_speech(variants[0])
+        miss_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        repeats = [rag.clean_speech(v) for v in variants[1:] * 50]
+        hit_us = (time.perf_counter() - start) / len(repeats) * 1e6
+
+        if llm.requests != 1 or any(r != first for r in repeats):
+            print(f"Error: {llm.requests} LLM calls for one normalized fragment.")
+            return False
+        stats = rag.SPEECH_CACHE.stats()
+        if stats["hits"] != len(repeats) or stats["misses"] != 1:
+            print(f"Error: unexpected counters {stats}")
+            return False
+        print(f"Success: miss {miss_ms:.0f} ms, hit {hit_us:.1f} us, stats {stats}")
+
+        # 2. Failed reconstructions are not cached
+        rag.client = Groq(api_key="test", base_url="http://127.0.0.1:9", max_retries=0)
+        if rag.clean_speech("select option b") != "select option b" or len(rag.SPEECH_CACHE) != 1:
+            print("Error: fallback text was cached.")
+            return False
+        print("Success: failures fall back without caching.")
+    finally:
+        llm.stop()
+
+    # 3. Bounded size and expiry
+    cache = TTLCache(maxsize=2, ttl=0.1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    if cache.get("b") is not None or cache.get("a") != 1 or cache.evictions != 1:
+        print("Error: least recently used entry not evicted.")
+        return False
+    time.sleep(0.15)
+    if cache.get("a") is not None:
+        print("Error: entry did not expire.")
+        return False
+    print("Success: LRU eviction and TTL expiry work.")
+    return True
+
+if __name__ == "__main__":
+    if test_speech_cache():
+        print("\nSPEECH CACHE TEST PASSED!")
+    else:
+        print("\nSPEECH CACHE TEST FAILED!")
+        sys.exit(1)
@@ -0,0 +1,129 @@
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Run against a scratch database; must be set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'revocation.db')}"
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+import database, models, auth
+import main
+import migrate_missing_columns
+
+client = TestClient(main.app)
+
+def login(email, password):
+    resp = client.post("/auth/login", json={"username": email, "password": password})
+    if resp.status_code != 200:
+        raise RuntimeError(f"Login failed: {resp.status_code} {resp.text}")
+    return resp.json()["access_token"]
+
+def status_with(token):
+    return client.get("/notifications", headers={"Authorization": f"Bearer {token}"}).status_code
+
+def reset_password(email, new_password):
+    client.post("/auth/forgot-password", json={"email": email})
+    db = database.SessionLocal()
+    try:
+        otp = db.query(models.User.reset_otp).filter(models.User.email == email).scalar()
+    finally:
+        db.close()
+    return client.post("/auth/reset-password", json={"token": otp, "new_password": new_password}).status_code
+
+def test_token_revocation():
+    print("Testing token revocation...")
+    for name in ("alice", "bob"):
+        resp = client.post("/auth/register", json={"name": name, "email": f"{name}@revoke.example.com", "password": "pass-1", "role": "learner"})
+        if resp.status_code != 200:
+            print(f"Error: register returned {resp.status_code}: {resp.text}")
+            return False
+
+    # 1. Password reset signs out every earlier token, including ones without a version
+    old_token = login("alice@revoke.example.com", "pass-1")
+    legacy_token = auth.create_access_token({"sub": "alice@revoke.example.com"})
+    if status_with(old_token) != 200 or status_with(legacy_token) != 200:
+        print("Error: fresh tokens rejected.")
+        return False
+    if reset_password("alice@revoke.example.com", "pass-2") != 200:
+        print("Error: password reset failed.")
+        return False
+    new_token = login("alice@revoke.example.com", "pass-2")
+    if status_with(old_token) != 401 or status_with(legacy_token) != 401 or status_with(new_token) != 200:
+        print("Error: old tokens still accepted after the reset, or the new one rejected.")
+        return False
+    print("Success: reset revokes earlier tokens; a new login works.")
+
+    # 2. Checks are in memory: an authenticated request does not query users
+    count = 0
+    def on_execute(conn, cursor, statement, *args):
+        nonlocal count
+        if "FROM users" in statement:
+            count += 1
+    status_with(new_token)
+    event.listen(database.engine, "before_cursor_execute", on_execute)
+    try:
+        db = database.SessionLocal()
+        try:
+            for _ in range(100):
+                auth.get_current_user(new_token, db)
+        finally:
+            db.close()
+    finally:
+        event.remove(database.engine, "before_cursor_execute", on_execute)
+    if count != 0:
+        print(f"Error: {count} users queries for 100 checks.")
+        return False
+    print("Success: 100 authenticated checks with no users queries.")
+
+    # 3. Revocations made by another worker arrive with the next sync
+    bob_token = login("bob@revoke.example.com", "pass-1")
+    db = database.SessionLocal()
+    try:
+        db.query(models.User).filter(models.User.email == "bob@revoke.example.com").update({"token_version": 1})
+        db.commit()
+    finally:
+        db.close()
+    before = status_with(bob_token)
+    interval, auth.REVOCATION_SYNC_SECONDS = auth.REVOCATION_SYNC_SECONDS, 0
+    try:
+        after = status_with(bob_token)
+    finally:
+        auth.REVOCATION_SYNC_SECONDS = interval
+    if before != 200 or after != 401:
+        print(f"Error: external revocation gave {before} before the sync and {after} after.")
+        return False
+    print("Success: revocations from other workers apply after the periodic sync.")
+
+    # 4. Existing databases get the column from the migration script
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        conn = sqlite3.connect("edweb.db")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR)")
+        conn.execute("INSERT INTO users (email) VALUES ('old@revoke.example.com')")
+        conn.commit()
+        conn.close()
+        migrate_missing_columns.migrate()
+        conn = sqlite3.connect("edweb.db")
+        version = conn.execute("SELECT token_version FROM users").fetchone()[0]
+        conn.close()
+    finally:
+        os.chdir(cwd)
+    if version != 0:
+        print("Error: migration did not add token_version.")
+        return False
+    print("Success: migrate_missing_columns adds users.token_version.")
+    return True
+
+if __name__ == "__main__":
+    if test_token_revocation():
+        print("\nTOKEN REVOCATION TEST PASSED!")
+    else:
+        print("\nTOKEN REVOCATION TEST FAILED!")
+        sys.exit(1)
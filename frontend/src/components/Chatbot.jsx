@@ -29,9 +29,48 @@ const Chatbot = () => {
         setIsLoading(true);
 
         try {
-            const response = await api.post('/api/chat', { message: userMessage.text });
-            const aiMessage = { text: response.data.response, sender: 'ai' };
-            setMessages(prev => [...prev, aiMessage]);
+            // Stream the answer (Server-Sent Events) so it appears as it is generated
+            const token = localStorage.getItem('token');
+            const response = await fetch(`${api.defaults.baseURL}/api/chat`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                },
+                body: JSON.stringify({ message: userMessage.text, stream: true }),
+            });
+            if (!response.ok || !response.body) throw new Error(`Chat failed: ${response.status}`);
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            // The reply is found by id and set to the full text so far, so it
+            // doesn't matter when React runs the updater
+            const replyId = `ai-${Date.now()}`;
+            let received = "";
+            const appendText = (text) => {
+                received += text;
+                const reply = { id: replyId, text: received, sender: 'ai' };
+                setMessages(prev => prev.some(m => m.id === replyId)
+                    ? prev.map(m => (m.id === replyId ? reply : m))
+                    : [...prev, reply]);
+            };
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split("\n\n");
+                buffer = events.pop();
+                for (const event of events) {
+                    const lines = event.split("\n");
+                    const type = lines.find(l => l.startsWith("event: "))?.slice(7) || "message";
+                    const data = lines.find(l => l.startsWith("data: "))?.slice(6);
+                    if (type === "error") throw new Error("AI response failed");
+                    if (type === "message" && data) appendText(JSON.parse(data).token);
+                }
+            }
+            if (!received) throw new Error("Empty AI response");
         } catch (error) {
             console.error("Chat error:", error);
             const errorMessage = { text: "Sorry, I'm having trouble connecting right now. Please try again later.", sender: 'ai' };
@@ -95,7 +134,7 @@ const Chatbot = () => {
                         </div>
                     ))}
 
-                    {isLoading && (
+                    {isLoading && messages[messages.length - 1].sender !== 'ai' && (
                         <div className="flex justify-start">
                             <div className="bg-white p-4 rounded-2xl rounded-bl-none border border-slate-100 shadow-sm flex gap-1">
                                 <div className="w-2 h-2 bg-indigo-400 rounded-full animate-bounce"></div>
@@ -21,10 +21,13 @@ const Notifications = () => {
         fetchNotifications();
     }, []);
 
-    const markAsRead = async (id) => {
+    const markAsRead = async (notification) => {
         try {
-            await api.put(`/notifications/${id}/read`);
-            setNotifications(prev => prev.map(n => n.id === id ? { ...n, is_read: true } : n));
+            const url = notification.source === 'broadcast'
+                ? `/notifications/broadcasts/${notification.id}/read`
+                : `/notifications/${notification.id}/read`;
+            await api.put(url);
+            setNotifications(prev => prev.map(n => n.id === notification.id && n.source === notification.source ? { ...n, is_read: true } : n));
         } catch (err) {
             console.error('Failed to mark as read:', err);
         }
@@ -62,7 +65,7 @@ const Notifications = () => {
                 <div className="space-y-4">
                     {notifications.map((n) => (
                         <div
-                            key={n.id}
+                            key={`${n.source}-${n.id}`}
                             className={`p-5 rounded-2xl border transition-all ${n.is_read ? 'bg-white border-slate-100 opacity-75' : 'bg-white border-indigo-100 shadow-md shadow-indigo-500/5'
                                 }`}
                         >
@@ -81,7 +84,7 @@ const Notifications = () => {
                                 </div>
                                 {!n.is_read && (
                                     <button
-                                        onClick={() => markAsRead(n.id)}
+                                        onClick={() => markAsRead(n)}
                                         className="text-xs font-bold text-indigo-600 hover:text-indigo-800 uppercase tracking-wider"
                                     >
                                         Mark as read